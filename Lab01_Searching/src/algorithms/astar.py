@@ -1,21 +1,23 @@
 import heapq
 from utils.graph import Graph
+from utils.stepwise import Expansion, run
 
 
-def search(graph: Graph, start: int, goal: int) -> list:
+def steps(graph: Graph, start: int, goal: int):
     queue = [
         (graph.get_heuristic(start), 0, start, [])
     ]  # Initialize queue with start node
 
     visited = set()  # Initialize visited set
     while queue:
-        _, cost, node, path = heapq.heappop(queue)
+        f, cost, node, path = heapq.heappop(queue)
         if node in visited:
             continue
         path = path + [node]
         if graph.is_goal(node, goal):
             return path
         visited.add(node)
+        yield Expansion(node, len(queue), cost, f)
         for neighbor in graph.get_neighbors(node):
             weight = graph.get_weight(node, neighbor)
             if neighbor not in visited and weight > 0:
@@ -30,3 +32,7 @@ def search(graph: Graph, start: int, goal: int) -> list:
                 )
 
     return -1
+
+
+def search(graph: Graph, start: int, goal: int) -> list:
+    return run(steps(graph, start, goal))
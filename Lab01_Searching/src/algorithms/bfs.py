@@ -1,10 +1,11 @@
 from utils.graph import Graph
 from collections import deque
+from utils.stepwise import Expansion, run
 
 # from utils.input_output import convert_to_char_list, map_func
 
 
-def search(graph: Graph, start: int, goal: int) -> list:
+def steps(graph: Graph, start: int, goal: int):
     queue = deque([start])  # Initialize queue with start node
     visited = set()  # Initialize visited set
     visited.add(start)
@@ -16,6 +17,7 @@ def search(graph: Graph, start: int, goal: int) -> list:
         # print("Pop node: ", map_func(node))
         if graph.is_goal(node, goal):
             return construct_path(parent, start, goal)
+        yield Expansion(node, len(queue), None, None)
 
         for neighbor in graph.get_neighbors(node):
             if neighbor not in visited:
@@ -25,6 +27,10 @@ def search(graph: Graph, start: int, goal: int) -> list:
     return -1
 
 
+def search(graph: Graph, start: int, goal: int) -> list:
+    return run(steps(graph, start, goal))
+
+
 def construct_path(parent, start, goal):
     path = []
     current = goal
@@ -2,17 +2,19 @@ from utils.graph import Graph
 from collections import deque
 from utils.input_output import convert_to_char_list, map_func
 from algorithms.bfs import construct_path
+from utils.stepwise import Expansion, run
 
 # Implement depth-first search algorithm
 
 
-def search(graph: Graph, start: int, goal: int) -> list:
+def steps(graph: Graph, start: int, goal: int):
     # Define helper function to perform DFS
     def dfs(graph: Graph, start: int, goal: int, visited: list, path: list):
         # Mark the current node as visited
         visited[start] = True
         # Append the current node to the path
         path.append(start)
+        yield Expansion(start, len(path), len(path) - 1, None)
 
         neighbors = graph.get_neighbors(start)
         if goal in neighbors:
@@ -22,7 +24,7 @@ def search(graph: Graph, start: int, goal: int) -> list:
         # Recur for all the neighbors of the current node
         for neighbor in neighbors:
             if not visited[neighbor]:
-                if dfs(graph, neighbor, goal, visited, path):
+                if (yield from dfs(graph, neighbor, goal, visited, path)):
                     return True
 
         # If no path is found, backtrack
@@ -34,6 +36,10 @@ def search(graph: Graph, start: int, goal: int) -> list:
     path = []
 
     # Perform DFS
-    dfs(graph, start, goal, visited, path)
+    yield from dfs(graph, start, goal, visited, path)
 
     return path if path else -1
+
+
+def search(graph: Graph, start: int, goal: int) -> list:
+    return run(steps(graph, start, goal))
@@ -1,9 +1,10 @@
 import heapq
 from utils.graph import Graph
 from utils.input_output import map_func, convert_to_char_list
+from utils.stepwise import Expansion, run
 
 
-def search(graph: Graph, start: int, goal: int) -> list:
+def steps(graph: Graph, start: int, goal: int):
     queue = [
         (graph.get_heuristic(start), start, [])
     ]  # Initialize queue with start node
@@ -11,7 +12,7 @@ def search(graph: Graph, start: int, goal: int) -> list:
 
     while queue:
         # print("* Queue:", list(map(lambda x: map_func(x[1]), queue)))
-        _, node, path = heapq.heappop(queue)
+        h, node, path = heapq.heappop(queue)
         # print("==> Pop node", map_func(node), "from queue")
 
         if node in visited:
@@ -23,6 +24,7 @@ def search(graph: Graph, start: int, goal: int) -> list:
         if graph.is_goal(node, goal):
             return path
         visited.add(node)
+        yield Expansion(node, len(queue), None, h)
 
         # Early stopping if the goal is found
         neighbors = graph.get_neighbors(node)
@@ -45,3 +47,7 @@ def search(graph: Graph, start: int, goal: int) -> list:
                 heapq.heappush(queue, (graph.get_heuristic(neighbor), neighbor, path))
 
     return -1
+
+
+def search(graph: Graph, start: int, goal: int) -> list:
+    return run(steps(graph, start, goal))
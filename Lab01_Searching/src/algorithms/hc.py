@@ -1,7 +1,8 @@
 from utils.graph import Graph
+from utils.stepwise import Expansion, run
 
 
-def search(graph: Graph, start: int, goal: int) -> list:
+def steps(graph: Graph, start: int, goal: int):
     current = start
     path = [current]
 
@@ -11,6 +12,9 @@ def search(graph: Graph, start: int, goal: int) -> list:
             for neighbor in graph.get_neighbors(current)
             if graph.get_weight(current, neighbor) > 0
         ]
+        yield Expansion(
+            current, len(neighbors), len(path) - 1, graph.get_heuristic(current)
+        )
 
         if not neighbors:
             return -1  # No path found
@@ -24,3 +28,7 @@ def search(graph: Graph, start: int, goal: int) -> list:
         path.append(current)
 
     return path
+
+
+def search(graph: Graph, start: int, goal: int) -> list:
+    return run(steps(graph, start, goal))
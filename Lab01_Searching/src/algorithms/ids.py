@@ -1,24 +1,35 @@
 from utils.graph import Graph
+from utils.stepwise import Expansion, run
 
 
-def search(graph: Graph, start: int, goal: int) -> list:
+def steps(graph: Graph, start: int, goal: int):
     def dls(node, goal, depth):
+        # As in DFS, the frontier is the recursion stack: the nodes from the
+        # start down to this one
+        stack.append(node)
+        yield Expansion(node, len(stack), len(stack) - 1, None)
         if depth == 0 and graph.is_goal(node, goal):
             return [node]
         if depth > 0:
             for neighbor in graph.get_neighbors(node):
                 if graph.get_weight(node, neighbor) > 0:
-                    path = dls(neighbor, goal, depth - 1)
+                    path = yield from dls(neighbor, goal, depth - 1)
                     if path:
                         return [node] + path
 
+        stack.pop()
         return None
 
-    depth = 0
+    limit = 0
     while True:
-        result = dls(start, goal, depth)
+        stack = []
+        result = yield from dls(start, goal, limit)
         if result:
             return result
-        depth += 1
+        limit += 1
 
     return -1
+
+
+def search(graph: Graph, start: int, goal: int) -> list:
+    return run(steps(graph, start, goal))
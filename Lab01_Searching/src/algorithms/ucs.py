@@ -1,8 +1,9 @@
 import heapq
 from utils.graph import Graph
+from utils.stepwise import Expansion, run
 
 
-def search(graph: Graph, start: int, goal: int) -> list:
+def steps(graph: Graph, start: int, goal: int):
     queue = [(0, start, [])]  # Initialize queue with start node
     visited = set()  # Initialize visited set
 
@@ -14,6 +15,7 @@ def search(graph: Graph, start: int, goal: int) -> list:
         if graph.is_goal(node, goal):
             return path
         visited.add(node)
+        yield Expansion(node, len(queue), cost, cost)
         for neighbor in graph.get_neighbors(node):
             if neighbor not in visited:
                 weight = graph.get_weight(node, neighbor)
@@ -22,3 +24,5 @@ def search(graph: Graph, start: int, goal: int) -> list:
     return -1
 
 
+def search(graph: Graph, start: int, goal: int) -> list:
+    return run(steps(graph, start, goal))
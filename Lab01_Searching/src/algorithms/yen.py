@@ -0,0 +1,135 @@
+import heapq
+from utils.graph import Graph
+from algorithms import astar
+
+# Yen's k-shortest loopless paths.
+#
+# A shortest-path tree towards the goal is computed once (Dijkstra over the
+# reversed edges). Its distances are exact on the full graph, so they are an
+# admissible and consistent heuristic for every spur search, where nodes and
+# edges are only ever removed. When the tree path from a spur node avoids
+# everything removed for that spur, it is already optimal and no search is
+# needed at all; otherwise the spur path comes from A* guided by the tree.
+# Candidates are kept in a heap, and (Lawler's rule) each new path is only
+# spurred from the node where it deviated from its parent path.
+
+INF = float("inf")
+
+
+def shortest_path_tree(graph: Graph, goal: int):
+    dist = [INF] * graph.nodes
+    successor = [None] * graph.nodes
+    dist[goal] = 0
+    queue = [(0, goal)]
+
+    while queue:
+        cost, node = heapq.heappop(queue)
+        if cost > dist[node]:
+            continue
+        for predecessor in graph.get_predecessors(node):
+            new_cost = cost + graph.get_weight(predecessor, node)
+            if new_cost < dist[predecessor]:
+                dist[predecessor] = new_cost
+                successor[predecessor] = node
+                heapq.heappush(queue, (new_cost, predecessor))
+
+    return dist, successor
+
+
+class SpurGraph:
+    # View of a graph without some nodes and edges, using the tree distances
+    # as heuristic, so that astar.search can be run on it directly
+    def __init__(
+        self, graph: Graph, dist: list, removed_nodes: set, removed_edges: set
+    ):
+        self.graph = graph
+        self.dist = dist
+        self.removed_nodes = removed_nodes
+        self.removed_edges = removed_edges
+
+    def get_neighbors(self, node: int) -> list:
+        return [
+            neighbor
+            for neighbor in self.graph.get_neighbors(node)
+            if neighbor not in self.removed_nodes
+            and (node, neighbor) not in self.removed_edges
+            and self.dist[neighbor] < INF
+        ]
+
+    def get_heuristic(self, node: int) -> int:
+        return self.dist[node]
+
+    def is_goal(self, node: int, goal: int) -> bool:
+        return node == goal
+
+    def get_weight(self, u: int, v: int) -> int:
+        return self.graph.get_weight(u, v)
+
+
+def path_cost(graph: Graph, path: list) -> int:
+    return sum(graph.get_weight(u, v) for u, v in zip(path, path[1:]))
+
+
+def tree_path(successor: list, node: int, goal: int) -> list:
+    path = [node]
+    while node != goal:
+        node = successor[node]
+        path.append(node)
+    return path
+
+
+def spur_path(graph, spur, goal, dist, successor, removed_nodes, removed_edges):
+    if dist[spur] == INF:
+        return -1
+
+    # The tree path is optimal whenever it survives the removals. Removed
+    # edges all leave the spur node, which the tree path never revisits.
+    path = tree_path(successor, spur, goal)
+    if (spur, path[1]) not in removed_edges and not any(
+        node in removed_nodes for node in path
+    ):
+        return path
+
+    return astar.search(
+        SpurGraph(graph, dist, removed_nodes, removed_edges), spur, goal
+    )
+
+
+def search(graph: Graph, start: int, goal: int, k: int = 3) -> list:
+    dist, successor = shortest_path_tree(graph, goal)
+    if dist[start] == INF:
+        return -1
+
+    paths = [tree_path(successor, start, goal)]
+    deviations = [0]
+    candidates = []  # (cost, path, deviation index)
+    seen = {tuple(paths[0])}
+
+    while len(paths) < k:
+        last = paths[-1]
+        for i in range(deviations[-1], len(last) - 1):
+            root = last[: i + 1]
+            removed_edges = {
+                (last[i], path[i + 1]) for path in paths if path[: i + 1] == root
+            }
+            removed_nodes = set(root[:-1])
+
+            spur = spur_path(
+                graph, last[i], goal, dist, successor, removed_nodes, removed_edges
+            )
+            if spur == -1:
+                continue
+
+            candidate = root[:-1] + spur
+            if tuple(candidate) not in seen:
+                seen.add(tuple(candidate))
+                heapq.heappush(candidates, (path_cost(graph, candidate), candidate, i))
+
+        if not candidates:
+            break
+
+        _, path, deviation = heapq.heappop(candidates)
+        paths.append(path)
+        deviations.append(deviation)
+
+    return paths
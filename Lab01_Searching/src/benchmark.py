@@ -0,0 +1,116 @@
+# Record benchmark results and catch performance regressions.
+#
+# `record` runs every algorithm several times on each input and appends the
+# time and memory of each run to the results store (see
+# utils/results_store.py), tagged with the current git revision.
+# `compare` flags the (input, algorithm) pairs whose time or memory grew
+# significantly between a baseline revision and the current one, and exits
+# with status 1 if there is any.
+#
+# Usage (at `src` directory):
+#   git checkout <baseline> && python benchmark.py record test/test0*/input.txt
+#   git checkout <current> && python benchmark.py record test/test0*/input.txt
+#   python benchmark.py compare --baseline <baseline>
+
+import argparse
+import sys
+
+from utils.graph import Graph
+from utils.input_output import read_input
+from utils.performance import measure_performance
+from utils.results_store import (
+    DEFAULT_STORE,
+    append_results,
+    compare,
+    git_revision,
+    graph_hash,
+    load_results,
+    make_record,
+)
+from main import ALGORITHMS
+
+
+def record(input_files: list, repeat: int, store_path: str):
+    revision = git_revision()
+    for input_file in input_files:
+        data = read_input(input_file)
+        nodes, start, goal, adjacency_matrix, heuristic_weights = data
+        graph = Graph(nodes, adjacency_matrix, heuristic_weights)
+        graph_key = graph_hash(*data)
+
+        records = []
+        for name, algorithm in ALGORITHMS.items():
+            for _ in range(repeat):
+                _, time_taken, memory_used = measure_performance(
+                    algorithm, graph, start, goal
+                )
+                records.append(
+                    make_record(
+                        graph_key, input_file, name, revision, time_taken, memory_used
+                    )
+                )
+        append_results(records, store_path)
+        print(f"{input_file}: recorded {len(records)} runs at {revision}")
+
+
+def report(
+    store_path: str, baseline: str, current: str, alpha: float, min_change: float
+):
+    regressions = compare(
+        load_results(store_path), baseline, current, alpha, min_change
+    )
+    if not regressions:
+        print(f"No regression from {baseline} to {current}")
+        return 0
+
+    for regression in regressions:
+        # No relative growth to show from a baseline mean of 0
+        change = ""
+        if regression["baseline"]:
+            change = f"+{regression['current'] / regression['baseline'] - 1:.1%}, "
+        print(
+            f"{regression['input']} {regression['algorithm']}: "
+            f"{regression['metric']} {regression['baseline']:.6g} -> "
+            f"{regression['current']:.6g} "
+            f"({change}p = {regression['p_value']:.4f})"
+        )
+    return 1
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--store", default=DEFAULT_STORE, help="results store file")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = commands.add_parser("record", help="run and store benchmarks")
+    record_parser.add_argument("inputs", nargs="+", help="input files")
+    record_parser.add_argument(
+        "--repeat", type=int, default=10, help="runs per algorithm and input"
+    )
+
+    compare_parser = commands.add_parser("compare", help="compare to a baseline")
+    compare_parser.add_argument("--baseline", required=True, help="baseline revision")
+    compare_parser.add_argument(
+        "--current", default=None, help="revision to check (default: current one)"
+    )
+    compare_parser.add_argument(
+        "--alpha", type=float, default=0.05, help="significance level"
+    )
+    compare_parser.add_argument(
+        "--min-change",
+        type=float,
+        default=0.05,
+        help="smallest relative growth worth flagging",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    if args.command == "record":
+        record(args.inputs, args.repeat, args.store)
+    else:
+        current = args.current or git_revision()
+        sys.exit(
+            report(args.store, args.baseline, current, args.alpha, args.min_change)
+        )
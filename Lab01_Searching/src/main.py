@@ -53,10 +53,26 @@
 
 # main.py
 
+from functools import partial
 from utils.graph import Graph
 from utils.input_output import read_input, write_output
 from utils.performance import measure_performance
-from algorithms import bfs, dfs, ucs, ids, gbfs, astar, hc
+from algorithms import bfs, dfs, ucs, ids, gbfs, astar, hc, yen
+
+
+# List of algorithms to run
+ALGORITHMS = {
+    "BFS": bfs.search,
+    "DFS": dfs.search,
+    "UCS": ucs.search,
+    "IDS": ids.search,
+    "GBFS": gbfs.search,
+    "A*": astar.search,
+    "Hill-climbing": hc.search,
+}
+
+# Number of alternative routes listed by Yen's k-shortest paths
+K_SHORTEST_PATHS = 3
 
 
 def main():
@@ -74,23 +90,23 @@ def main():
     # Dictionary to store results
     results = {}
 
-    # List of algorithms to run
-    algorithms = {
-        "BFS": bfs.search,
-        "DFS": dfs.search,
-        "UCS": ucs.search,
-        "IDS": ids.search,
-        "GBFS": gbfs.search,
-        "A*": astar.search,
-        "Hill-climbing": hc.search,
-    }
     # Run each algorithm and measure performance
-    for name, algorithm in algorithms.items():
+    for name, algorithm in ALGORITHMS.items():
         path, time_taken, memory_used = measure_performance(
             algorithm, graph, start, goal
         )
         results[name] = {"path": path, "time": time_taken, "memory": memory_used}
 
+    # Alternative routes, written as numbered paths
+    paths, time_taken, memory_used = measure_performance(
+        partial(yen.search, k=K_SHORTEST_PATHS), graph, start, goal
+    )
+    results[f"Yen (k={K_SHORTEST_PATHS})"] = {
+        "paths": paths,
+        "time": time_taken,
+        "memory": memory_used,
+    }
+
     # Write results to output file
     write_output(output_file, results)
 
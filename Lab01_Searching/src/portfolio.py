@@ -0,0 +1,142 @@
+# Portfolio solver: race several algorithms on the same input and keep the
+# first acceptable answer.
+#
+# Each algorithm runs in its own worker process. As soon as one returns a
+# result meeting the criterion, the remaining workers are terminated:
+# • "any": the first path found by any algorithm.
+# • "optimal": the first path from an algorithm that guarantees the cheapest
+#   path (UCS, A*), only those are launched.
+# A -1 from a complete algorithm proves there is no path and also ends the
+# race. The winner of each input is logged.
+#
+# Usage (at `src` directory):
+#   python portfolio.py test/test01/input.txt test/test02/input.txt
+#   python portfolio.py test/test05/input.txt --criterion optimal --log portfolio.log
+
+import argparse
+import logging
+import multiprocessing
+import queue
+import time
+
+from utils.graph import Graph
+from utils.input_output import read_input
+from main import ALGORITHMS
+
+logger = logging.getLogger("portfolio")
+
+CRITERIA = ("any", "optimal")
+# Algorithms that always return a cheapest path
+OPTIMAL_ALGORITHMS = {"UCS", "A*"}
+# Algorithms whose -1 means that the goal is unreachable
+COMPLETE_ALGORITHMS = {"BFS", "DFS", "UCS", "GBFS", "A*"}
+
+
+def run_algorithm(name: str, graph: Graph, start: int, goal: int, results):
+    try:
+        path = ALGORITHMS[name](graph, start, goal)
+    except Exception:
+        path = None  # A crashed algorithm never wins
+    results.put((name, path))
+
+
+def race(
+    graph: Graph,
+    start: int,
+    goal: int,
+    algorithms: list = None,
+    criterion: str = "any",
+    timeout: float = None,
+):
+    # Return (winner, path, time taken), winner is None if nobody qualified
+    if criterion not in CRITERIA:
+        raise ValueError(f"criterion must be one of {CRITERIA}")
+    algorithms = list(ALGORITHMS) if algorithms is None else algorithms
+    if criterion == "optimal":
+        algorithms = [name for name in algorithms if name in OPTIMAL_ALGORITHMS]
+
+    results = multiprocessing.Queue()
+    workers = [
+        multiprocessing.Process(
+            target=run_algorithm,
+            args=(name, graph, start, goal, results),
+            daemon=True,
+        )
+        for name in algorithms
+    ]
+
+    start_time = time.perf_counter()
+    for worker in workers:
+        worker.start()
+
+    winner, path = None, -1
+    try:
+        for _ in workers:
+            remaining = None
+            if timeout is not None:
+                remaining = max(0, timeout - (time.perf_counter() - start_time))
+            name, result = results.get(timeout=remaining)
+            if result is None:
+                continue
+            if result != -1 or name in COMPLETE_ALGORITHMS:
+                winner, path = name, result
+                break
+    except queue.Empty:
+        pass
+    time_taken = time.perf_counter() - start_time
+
+    # Cancel the algorithms still running
+    for worker in workers:
+        if worker.is_alive():
+            worker.terminate()
+        worker.join()
+
+    return winner, path, time_taken
+
+
+def solve(
+    input_file: str,
+    algorithms: list = None,
+    criterion: str = "any",
+    timeout: float = None,
+):
+    nodes, start, goal, adjacency_matrix, heuristic_weights = read_input(input_file)
+    graph = Graph(nodes, adjacency_matrix, heuristic_weights)
+
+    winner, path, time_taken = race(graph, start, goal, algorithms, criterion, timeout)
+    if winner is None:
+        logger.info("%s: no algorithm met the '%s' criterion", input_file, criterion)
+    else:
+        logger.info(
+            "%s: %s won in %.6f seconds, path: %s",
+            input_file,
+            winner,
+            time_taken,
+            " -> ".join(map(str, path)) if path != -1 else "-1",
+        )
+    return winner, path, time_taken
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("inputs", nargs="+", help="input files containing the graphs")
+    parser.add_argument(
+        "--algorithms",
+        nargs="+",
+        choices=list(ALGORITHMS),
+        help="algorithms to race (default: all)",
+    )
+    parser.add_argument("--criterion", choices=CRITERIA, default="any")
+    parser.add_argument("--timeout", type=float, help="give up after this many seconds")
+    parser.add_argument("--log", help="also append the winners to this file")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    handlers = [logging.StreamHandler()]
+    if args.log:
+        handlers.append(logging.FileHandler(args.log))
+    logging.basicConfig(level=logging.INFO, format="%(message)s", handlers=handlers)
+    for input_file in args.inputs:
+        solve(input_file, args.algorithms, args.criterion, args.timeout)
@@ -0,0 +1,167 @@
+# Long-running query server around a single loaded graph.
+#
+# The graph file is read once at startup (and once per worker process), so
+# clients can send many searches against the same in-memory graph without
+# paying for parsing on every run.
+#
+# Protocol: newline-delimited JSON over localhost TCP or a Unix socket.
+# Each line is either one request object or a list of them (a batch):
+#   {"id": 1, "algorithm": "A*", "start": 0, "goal": 4}
+# "start" and "goal" default to the ones in the input file, "id" is echoed
+# back as-is. One response line is streamed per request, as soon as it is
+# done, so responses of a batch may arrive out of order:
+#   {"id": 1, "algorithm": "A*", "start": 0, "goal": 4, "path": [0, 2, 4],
+#    "search_time": 1.2e-05, "latency": 0.0007}
+# "latency" is measured from the moment the request line was received until
+# its response is written, "search_time" is the time spent inside the search.
+#
+# Usage (at `src` directory):
+#   python server.py test/test01/input.txt --port 8765
+#   python server.py test/test01/input.txt --unix /tmp/lab01.sock
+#   echo '[{"algorithm": "UCS"}, {"algorithm": "BFS", "goal": 3}]' | nc localhost 8765
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.graph import Graph
+from utils.input_output import read_input
+from main import ALGORITHMS
+
+# Graph loaded in each worker process by `init_worker`
+_graph = None
+
+
+def load_graph(input_file: str):
+    nodes, start, goal, adjacency_matrix, heuristic_weights = read_input(input_file)
+    return Graph(nodes, adjacency_matrix, heuristic_weights), start, goal
+
+
+def init_worker(input_file: str):
+    global _graph
+    _graph, _, _ = load_graph(input_file)
+
+
+def run_query(algorithm: str, start: int, goal: int):
+    start_time = time.perf_counter()
+    path = ALGORITHMS[algorithm](_graph, start, goal)
+    return path, time.perf_counter() - start_time
+
+
+class GraphServer:
+    def __init__(self, input_file: str, workers: int = None):
+        self.graph, self.start, self.goal = load_graph(input_file)
+        self.pool = ProcessPoolExecutor(
+            max_workers=workers, initializer=init_worker, initargs=(input_file,)
+        )
+
+    def validate(self, request) -> dict:
+        if not isinstance(request, dict):
+            raise ValueError("request must be a JSON object")
+        algorithm = request.get("algorithm")
+        if algorithm not in ALGORITHMS:
+            raise ValueError(
+                f"unknown algorithm {algorithm!r}, expected one of {list(ALGORITHMS)}"
+            )
+        query = {
+            "algorithm": algorithm,
+            "start": request.get("start", self.start),
+            "goal": request.get("goal", self.goal),
+        }
+        for key in ("start", "goal"):
+            node = query[key]
+            if not isinstance(node, int) or not 0 <= node < self.graph.nodes:
+                raise ValueError(f"{key} must be a node in [0, {self.graph.nodes})")
+        return query
+
+    async def answer(self, request, received: float) -> dict:
+        response = {"id": request.get("id")} if isinstance(request, dict) else {}
+        try:
+            query = self.validate(request)
+            response.update(query)
+            loop = asyncio.get_running_loop()
+            path, search_time = await loop.run_in_executor(
+                self.pool, run_query, query["algorithm"], query["start"], query["goal"]
+            )
+            response["path"] = path
+            response["search_time"] = search_time
+        except Exception as e:
+            response["error"] = str(e)
+        response["latency"] = time.perf_counter() - received
+        return response
+
+    async def handle_line(self, line: bytes, writer: asyncio.StreamWriter):
+        received = time.perf_counter()
+        try:
+            payload = json.loads(line)
+        except json.JSONDecodeError as e:
+            writer.write((json.dumps({"error": f"invalid JSON: {e}"}) + "\n").encode())
+            await writer.drain()
+            return
+
+        requests = payload if isinstance(payload, list) else [payload]
+        # Stream each response back as soon as its search finishes
+        for done in asyncio.as_completed(
+            [self.answer(request, received) for request in requests]
+        ):
+            response = await done
+            writer.write((json.dumps(response) + "\n").encode())
+            await writer.drain()
+
+    async def handle_client(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        # Lines are handled concurrently so clients can pipeline requests
+        tasks = set()
+        try:
+            while line := await reader.readline():
+                if not line.strip():
+                    continue
+                task = asyncio.create_task(self.handle_line(line, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8765, unix: str = None):
+        if unix:
+            server = await asyncio.start_unix_server(self.handle_client, path=unix)
+            print(f"Serving {self.graph.nodes}-node graph on {unix}")
+        else:
+            server = await asyncio.start_server(self.handle_client, host, port)
+            print(f"Serving {self.graph.nodes}-node graph on {host}:{port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.pool.shutdown(cancel_futures=True)
+            if unix and os.path.exists(unix):
+                os.remove(unix)
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("input", help="input file containing the graph")
+    parser.add_argument("--host", default="127.0.0.1", help="host to listen on")
+    parser.add_argument("--port", type=int, default=8765, help="port to listen on")
+    parser.add_argument("--unix", help="listen on this Unix socket instead of TCP")
+    parser.add_argument(
+        "--workers", type=int, default=None, help="number of worker processes"
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    server = GraphServer(args.input, args.workers)
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
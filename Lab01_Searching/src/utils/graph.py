@@ -25,3 +25,11 @@ class Graph:
 
     def get_weight(self, u: int, v: int) -> int:
         return self.adjacency_matrix[u][v]
+
+    def get_predecessors(self, node: int) -> list:
+        predecessors = []
+        for idx in range(self.nodes):
+            if self.adjacency_matrix[idx][node] > 0:
+                predecessors.append(idx)
+
+        return predecessors
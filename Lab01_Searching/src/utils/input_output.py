@@ -44,7 +44,8 @@ def convert_to_char_list(int_list):
 
 def read_input(file_path: str):
     with open(file_path, "r") as file:
-        lines = file.readlines()
+        # Skip blank lines so trailing newlines do not hide the heuristic weights
+        lines = [line for line in file.readlines() if line.strip()]
 
     nodes = int(lines[0].strip())
     start, goal = map(int, lines[1].strip().split())
@@ -60,9 +61,17 @@ def write_output(file_path: str, results):
     with open(file_path, "w") as file:
         for algorithm, result in results.items():
             file.write(f"{algorithm}:\n")
-            file.write(
-                f"Path: {' -> '.join(map(str, result['path'])) if result['path'] != -1 else '-1'}\n"
-            )
+            if "paths" in result:
+                # Alternative routes are numbered from the shortest one
+                if result["paths"] == -1:
+                    file.write("Path 1: -1\n")
+                else:
+                    for i, path in enumerate(result["paths"], 1):
+                        file.write(f"Path {i}: {' -> '.join(map(str, path))}\n")
+            else:
+                file.write(
+                    f"Path: {' -> '.join(map(str, result['path'])) if result['path'] != -1 else '-1'}\n"
+                )
             file.write(f"Time: {result['time']} seconds\n")
             file.write(f"Memory: {result['memory']} KB\n")
             file.write("\n")
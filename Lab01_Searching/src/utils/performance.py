@@ -5,10 +5,10 @@ from utils.graph import Graph
 
 def measure_performance(algorithm, graph: Graph, start: int, goal: int):
     tracemalloc.start()
-    start_time = time.time()
+    start_time = time.perf_counter()
     # print("Start time: ", start_time)
     path = algorithm(graph, start, goal)
-    end_time = time.time()
+    end_time = time.perf_counter()
     # print("End time: ", end_time)
     current, peak = tracemalloc.get_traced_memory()
     tracemalloc.stop()
@@ -0,0 +1,128 @@
+# Append-only store of benchmark results, one JSON record per line.
+#
+# Each record is keyed by the hash of the graph, the algorithm and the git
+# revision of the code that produced it:
+# {"graph_hash": "...", "input": "test/test01/input.txt", "algorithm": "A*",
+#  "revision": "1a2b3c4", "timestamp": 1700000000.0, "time": 1.2e-05,
+#  "memory": 0.6}
+
+import hashlib
+import json
+import os
+import random
+import subprocess
+import time
+from statistics import mean
+
+DEFAULT_STORE = "results.jsonl"
+
+
+def graph_hash(nodes, start, goal, adjacency_matrix, heuristic_weights) -> str:
+    data = json.dumps([nodes, start, goal, adjacency_matrix, heuristic_weights])
+    return hashlib.sha256(data.encode()).hexdigest()[:16]
+
+
+def git_revision() -> str:
+    # Short hash of HEAD, marked dirty when the algorithms have local changes
+    src_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        revision = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=src_dir,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+        changes = subprocess.run(
+            ["git", "status", "--porcelain", "--", "algorithms", "utils"],
+            cwd=src_dir,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return revision + "-dirty" if changes else revision
+
+
+def make_record(graph_key, input_file, algorithm, revision, time_taken, memory_used):
+    return {
+        "graph_hash": graph_key,
+        "input": input_file,
+        "algorithm": algorithm,
+        "revision": revision,
+        "timestamp": time.time(),
+        "time": time_taken,
+        "memory": memory_used,
+    }
+
+
+def append_results(records, store_path: str = DEFAULT_STORE):
+    with open(store_path, "a") as file:
+        for record in records:
+            file.write(json.dumps(record) + "\n")
+
+
+def load_results(store_path: str = DEFAULT_STORE) -> list:
+    if not os.path.exists(store_path):
+        return []
+    with open(store_path, "r") as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def permutation_test(baseline: list, current: list, rounds: int = 5000, seed: int = 0):
+    # One-sided p-value of mean(current) > mean(baseline) under random relabeling
+    n, m = len(baseline), len(current)
+    pooled = baseline + current
+    total = sum(pooled)
+    observed = sum(current) / m - sum(baseline) / n
+    rng = random.Random(seed)
+    extreme = 0
+    for _ in range(rounds):
+        rng.shuffle(pooled)
+        shuffled = sum(pooled[n:])
+        if shuffled / m - (total - shuffled) / n >= observed - 1e-12:
+            extreme += 1
+    return (extreme + 1) / (rounds + 1)
+
+
+def compare(
+    records: list,
+    baseline: str,
+    current: str,
+    alpha: float = 0.05,
+    min_change: float = 0.05,
+) -> list:
+    # Flag (graph, algorithm, metric) whose mean grew by more than `min_change`
+    # from the baseline revision with a p-value below `alpha`
+    groups = {}
+    for record in records:
+        if record["revision"] not in (baseline, current):
+            continue
+        key = (record["graph_hash"], record["algorithm"])
+        groups.setdefault(key, {baseline: [], current: []})
+        groups[key][record["revision"]].append(record)
+
+    regressions = []
+    for (graph_key, algorithm), runs in groups.items():
+        if len(runs[baseline]) < 2 or len(runs[current]) < 2:
+            continue
+        for metric in ("time", "memory"):
+            before = [record[metric] for record in runs[baseline]]
+            after = [record[metric] for record in runs[current]]
+            if mean(after) <= mean(before) * (1 + min_change):
+                continue
+            p_value = permutation_test(before, after)
+            if p_value < alpha:
+                regressions.append(
+                    {
+                        "graph_hash": graph_key,
+                        "input": runs[current][-1]["input"],
+                        "algorithm": algorithm,
+                        "metric": metric,
+                        "baseline": mean(before),
+                        "current": mean(after),
+                        "p_value": p_value,
+                    }
+                )
+    return regressions
@@ -0,0 +1,63 @@
+# Helpers for the stepwise form of the search algorithms.
+#
+# Every algorithm in `algorithms/` exposes `steps(graph, start, goal)`, a
+# generator that yields one `Expansion` event per expanded node and returns
+# the path (or -1) when the search ends. `search()` is a thin driver over it.
+#
+# Example:
+#   for event in astar.steps(graph, 0, 4):
+#       print(event.node, event.frontier_size, event.g, event.f)
+
+from collections import namedtuple
+
+# node: the node being expanded
+# frontier_size: number of entries in the queue/stack at that moment (for the
+#   recursive DFS and IDS, the recursion stack: the nodes on the current path)
+# g: path cost (or depth) of the node, None if the algorithm does not track it
+# f: priority the node was selected with, None if the algorithm has none
+Expansion = namedtuple("Expansion", ["node", "frontier_size", "g", "f"])
+
+# Returned by `run_with_budget` when the search was cut off
+CUT_OFF = None
+
+
+def run(steps):
+    # Drive a search generator to the end and return its result
+    while True:
+        try:
+            next(steps)
+        except StopIteration as stop:
+            return stop.value
+
+
+def run_with_budget(steps, max_expansions: int):
+    # Let at most `max_expansions` expansions complete, return CUT_OFF if the
+    # search needs more than that
+    for _ in range(max_expansions + 1):
+        try:
+            next(steps)
+        except StopIteration as stop:
+            return stop.value
+    steps.close()
+    return CUT_OFF
+
+
+def round_robin(searches: dict, max_expansions: int = None) -> dict:
+    # Interleave several searches one expansion at a time.
+    # `searches` maps a name to a generator, the result maps it to the path,
+    # or to CUT_OFF for searches that need more than `max_expansions` expansions.
+    results = {}
+    running = dict(searches)
+    rounds = 0
+    while running and (max_expansions is None or rounds <= max_expansions):
+        for name, steps in list(running.items()):
+            try:
+                next(steps)
+            except StopIteration as stop:
+                results[name] = stop.value
+                del running[name]
+        rounds += 1
+    for name, steps in running.items():
+        steps.close()
+        results[name] = CUT_OFF
+    return {name: results[name] for name in searches}
@@ -0,0 +1,164 @@
+"""
+Headless batch runner: solve every input of the selected levels without the
+pygame screens.
+
+Each input file runs in a worker process: the algorithms of its level
+(LEVEL_ALGORITHMS for levels 1-3, CBS for level 4) are run one after the
+other, the output file is written as the visualizer writes it, and one CSV
+row per (map, algorithm) records the run time, the number of expansions
+(high level nodes for CBS) and the path cost (travel time for a single
+agent, sum of path lengths for CBS; empty when no path was found).
+
+Outputs and the CSV go to ../data/batch (git-ignored) by default, so that a
+batch run does not overwrite the reference outputs committed in
+../data/output; pass --output-dir ../data/output to regenerate those.
+
+Usage (at `src` directory):
+    python batch.py
+    python batch.py --levels 1 4 --workers 4 --csv ../data/batch/results.csv
+    python batch.py --output-dir ../data/output
+"""
+
+import argparse
+import csv
+import glob
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from citymap import CityMap
+from search_algorithms import LEVEL_ALGORITHMS, run_algorithm
+from simulation.multiple_agents import (
+    CBS,
+    generate_plan,
+    load_environment,
+    write_output,
+)
+from utils import write_paths
+
+LEVELS = (1, 2, 3, 4)
+CSV_FIELDS = ("map", "level", "algorithm", "runtime", "expansions", "path_cost")
+INPUT_PATTERN = re.compile(r"input(\d+)_level(\d+)\.txt$")
+
+
+class PathsCBS(CBS):
+    # CBS returning the State paths instead of the formatted plan
+    def generate_plan(self, solution):
+        return solution
+
+
+def path_cost(city_map: CityMap, path) -> int:
+    # Time to drive the path: the cost of entering each cell after the start
+    return sum(city_map.get_cost(cell) for cell in path[1:])
+
+
+def run_single_agent(input_file: str, output_file: str, level: int):
+    city_map = CityMap.from_file(input_file)
+    rows = []
+    paths = {}
+    for name, algorithm in LEVEL_ALGORITHMS[level].items():
+        stats = {}
+        start_time = time.perf_counter()
+        path = run_algorithm(algorithm, city_map, level, stats)
+        runtime = time.perf_counter() - start_time
+        paths[name] = path
+        rows.append(
+            (
+                name,
+                runtime,
+                stats.get("expansions"),
+                path_cost(city_map, path) if path else None,
+            )
+        )
+    write_paths(output_file, paths)
+    return rows
+
+
+def run_multiple_agents(input_file: str, output_file: str):
+    with open(input_file, "r") as param_file:
+        env = load_environment(param_file)
+    solver = PathsCBS(env)
+    start_time = time.perf_counter()
+    solution = solver.search()
+    runtime = time.perf_counter() - start_time
+    cost = None
+    if solution:
+        write_output(output_file, generate_plan(solution))
+        cost = env.compute_solution_cost(solution)
+    return [("CBS", runtime, solver.stats["expanded"], cost)]
+
+
+def run_input(input_file: str, output_dir: str):
+    """
+    Solve one input file and write its output file. Return its CSV rows.
+    """
+    number, level = map(int, INPUT_PATTERN.search(input_file).groups())
+    output_file = os.path.join(output_dir, f"output{number}_level{level}.txt")
+    if level == 4:
+        results = run_multiple_agents(input_file, output_file)
+    else:
+        results = run_single_agent(input_file, output_file, level)
+
+    map_name = os.path.basename(input_file)
+    return [
+        {
+            "map": map_name,
+            "level": level,
+            "algorithm": name,
+            "runtime": f"{runtime:.6f}",
+            "expansions": "" if expansions is None else expansions,
+            "path_cost": "" if cost is None else cost,
+        }
+        for name, runtime, expansions, cost in results
+    ]
+
+
+def find_inputs(input_dir: str, levels) -> list:
+    # Input files of the given levels, by level and then by number
+    inputs = []
+    for input_file in glob.glob(os.path.join(input_dir, "input*_level*.txt")):
+        match = INPUT_PATTERN.search(input_file)
+        if match and int(match.group(2)) in levels:
+            inputs.append((int(match.group(2)), int(match.group(1)), input_file))
+    return [input_file for _, _, input_file in sorted(inputs)]
+
+
+def run_batch(input_files: list, output_dir: str, csv_file: str, workers: int = None):
+    os.makedirs(output_dir, exist_ok=True)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(run_input, input_files, [output_dir] * len(input_files))
+        with open(csv_file, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+            writer.writeheader()
+            # Rows come back in input order, whatever the worker that ran them
+            for input_file, rows in zip(input_files, results):
+                writer.writerows(rows)
+                print(f"{input_file}: {len(rows)} runs")
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--levels",
+        type=int,
+        nargs="+",
+        choices=LEVELS,
+        default=list(LEVELS),
+        help="levels to run",
+    )
+    parser.add_argument("--input-dir", default="../data/input", help="input files")
+    parser.add_argument("--output-dir", default="../data/batch", help="output files")
+    parser.add_argument(
+        "--csv", default="../data/batch/results.csv", help="CSV file of the runs"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None, help="worker processes (default: CPUs)"
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    input_files = find_inputs(args.input_dir, args.levels)
+    run_batch(input_files, args.output_dir, args.csv, args.workers)
@@ -38,9 +38,12 @@ Numbers (1, 4, 5, 8) - indicate the time required to travel between two points
 
 # Define enum for cell types
 
+import heapq
 from enum import Enum
 from typing import List, Tuple, Optional, Dict
 
+import numpy as np
+
 
 class CellType(Enum):
     EMPTY = 0
@@ -60,6 +63,16 @@ class CellType(Enum):
         return ""
 
 
+# Cell types indexed by their value, and the values used in the hot paths
+CELL_TYPES = list(CellType)
+FUEL_STATION = CellType.FUEL_STATION.value
+TOLL_ROAD = CellType.TOLL_ROAD.value
+OBSTACLE = CellType.OBSTACLE.value
+
+# Moves of a vehicle, in the order searches generate them
+DIRECTIONS = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+
+
 # Define class for cell
 
 
@@ -82,14 +95,29 @@ class Cell:
         return f"{self.type}{self.value}({self.row}, {self.col})"
 
 
+# Returned for every lookup outside of the map
+OUT_OF_BOUNDS = Cell(-1, -1, CellType.OBSTACLE, -1)
+
+
 class CityMap:
+    """
+    The map is stored as two compact arrays of shape (rows, cols): `cell_types`
+    (uint8, the CellType values) and `cell_values` (int16, toll time, refuel
+    time or agent index). `Cell` objects are only built on demand by
+    `get_cell`.
+
+    Searches run on flat cell indices `row * cols + col` and the neighbor
+    table returned by `get_neighbor_table`.
+    """
+
     def __init__(
         self,
         rows: int,
         cols: int,
         delivery_time: int,
         fuel_capacity: int,
-        grid: List[List["Cell"]],
+        cell_types: np.ndarray,
+        cell_values: np.ndarray,
         start: Tuple[int, int],
         goal: Tuple[int, int],
         start_points: Dict[int, Tuple[int, int]],
@@ -99,90 +127,123 @@ class CityMap:
         self.cols = cols
         self.delivery_time = delivery_time
         self.fuel_capacity = fuel_capacity
-        self.grid = grid
+        self.cell_types = np.ascontiguousarray(cell_types, dtype=np.uint8)
+        self.cell_values = np.ascontiguousarray(cell_values, dtype=np.int16)
         self.start = start
         self.goal = goal
         self.fuel = fuel_capacity  # Initialize with full fuel tank
         self.start_points = start_points
         self.goal_points = goal_points
+        # Fewest moves from each cell to a fuel station or the goal, by goal,
+        # built on demand
+        self.fuel_distances: Dict[int, List[float]] = {}
+        # Passable neighbors and step costs of each cell, built on first use
+        self.neighbor_table: Optional[List[Tuple[int, ...]]] = None
+        self.step_costs: Optional[List[int]] = None
+        # (limit, distances to the goal) by (goal, start), built on demand
+        self.goal_distances: Dict[Tuple[int, int], Tuple[float, List[float]]] = {}
+        self.make_flat_views()
+
+    def make_flat_views(self):
+        # Flat views sharing memory with the arrays, indexed by row * cols + col.
+        # Indexing them yields plain ints, far cheaper than numpy scalar access.
+        self.flat_types = memoryview(self.cell_types).cast("B")
+        self.flat_values = memoryview(self.cell_values).cast("B").cast("h")
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["flat_types"], state["flat_values"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.make_flat_views()
 
     @staticmethod
     def from_file(filepath: str) -> "CityMap":
         with open(filepath, "r") as file:
-            lines = file.readlines()
-            rows, cols, delivery_time, fuel_capacity = map(
-                int, lines[0].strip().split()
-            )
-            temp_grid = [list(map(str, line.strip().split())) for line in lines[1:]]
-            start: Tuple[int, int] = None
-            goal: Tuple[int, int] = None
-            grid = []
-            start_points: Dict[int, Tuple[int, int]] = {}
-            goal_points: Dict[int, Tuple[int, int]] = {}
-            for i in range(rows):
-                row = []
-                for j in range(cols):
-                    cell_type = CellType.EMPTY
-                    cell_value = 0
-                    if temp_grid[i][j].startswith("S"):
-                        cell_type = CellType.START
-                        if temp_grid[i][j] == "S":
-                            start = (i, j)
-                            start_points[0] = (i, j)
-                        else:
-                            cell_value = int(temp_grid[i][j][1:])
-                            start_points[cell_value] = (i, j)
-                    elif temp_grid[i][j].startswith("G"):
-                        cell_type = CellType.GOAL
-                        if temp_grid[i][j] == "G":
-                            goal = (i, j)
-                            goal_points[0] = (i, j)
-                        else:
-                            cell_value = int(temp_grid[i][j][1:])
-                            goal_points[cell_value] = (i, j)
-                    elif temp_grid[i][j].startswith("F"):
-                        # Format: F{value}: F12, F4, ...
-                        cell_type = CellType.FUEL_STATION
-                        cell_value = int(temp_grid[i][j][1:])
-                    elif temp_grid[i][j] == "-1":
-                        cell_type = CellType.OBSTACLE
-                        cell_value = -1
-                    elif temp_grid[i][j] == "0":
-                        cell_type = CellType.EMPTY
-                    else:
-                        cell_type = CellType.TOLL_ROAD
-                        cell_value = int(temp_grid[i][j])
-                    row.append(Cell(i, j, cell_type, cell_value))
-                grid.append(row)
-            # print(grid)
-            return CityMap(
-                rows,
-                cols,
-                delivery_time,
-                fuel_capacity,
-                grid,
-                start,
-                goal,
-                start_points,
-                goal_points,
-            )
+            tokens = file.read().split()
+        rows, cols, delivery_time, fuel_capacity = map(int, tokens[:4])
+        if len(tokens) < 4 + rows * cols:
+            raise ValueError(f"Expected {rows} x {cols} cells in {filepath}")
+        grid = np.array(tokens[4 : 4 + rows * cols]).reshape(rows, cols)
+
+        # Classify every token at once by its first character
+        first = grid.astype("U1")
+        is_start = first == "S"
+        is_goal = first == "G"
+        is_fuel = first == "F"
+        is_number = ~(is_start | is_goal | is_fuel)
+
+        cell_types = np.full((rows, cols), CellType.EMPTY.value, dtype=np.uint8)
+        cell_values = np.zeros((rows, cols), dtype=np.int16)
+
+        # Numbers: 0 is an empty cell, -1 an obstacle, the rest toll roads
+        cell_values[is_number] = grid[is_number].astype(np.int16)
+        cell_types[is_number & (cell_values == -1)] = CellType.OBSTACLE.value
+        cell_types[is_number & (cell_values != -1) & (cell_values != 0)] = (
+            CellType.TOLL_ROAD.value
+        )
+
+        # Format: F{value}: F12, F4, ...
+        cell_types[is_fuel] = CellType.FUEL_STATION.value
+        cell_values[is_fuel] = np.char.lstrip(grid[is_fuel], "F").astype(np.int16)
+
+        # Start and goal points: S/G for vehicle 0, S{n}/G{n} for vehicle n
+        start: Tuple[int, int] = None
+        goal: Tuple[int, int] = None
+        start_points: Dict[int, Tuple[int, int]] = {}
+        goal_points: Dict[int, Tuple[int, int]] = {}
+        for mask, cell_type, points in (
+            (is_start, CellType.START, start_points),
+            (is_goal, CellType.GOAL, goal_points),
+        ):
+            cell_types[mask] = cell_type.value
+            for i, j in np.argwhere(mask).tolist():
+                index = int(grid[i, j][1:]) if len(grid[i, j]) > 1 else 0
+                cell_values[i, j] = index
+                points[index] = (i, j)
+        start = start_points.get(0)
+        goal = goal_points.get(0)
+
+        return CityMap(
+            rows,
+            cols,
+            delivery_time,
+            fuel_capacity,
+            cell_types,
+            cell_values,
+            start,
+            goal,
+            start_points,
+            goal_points,
+        )
 
     def get_cell(self, position: Tuple[int, int]) -> Cell:
         if (0 <= position[0] < self.rows) and (0 <= position[1] < self.cols):
-            return self.grid[position[0]][position[1]]
+            k = position[0] * self.cols + position[1]
+            return Cell(
+                position[0],
+                position[1],
+                CELL_TYPES[self.flat_types[k]],
+                self.flat_values[k],
+            )
 
-        return Cell(-1, -1, CellType.OBSTACLE, -1)
+        return OUT_OF_BOUNDS
 
     def set_cell(self, position: Tuple[int, int], cell: Cell):
-        self.grid[position[0]][position[1]] = cell
+        self.cell_types[position] = cell.type.value
+        self.cell_values[position] = cell.value
+        self.fuel_distances = {}
+        self.neighbor_table = None
+        self.step_costs = None
+        self.goal_distances = {}
 
     def is_valid_move(self, position: Tuple[int, int]) -> bool:
-        cell = self.get_cell(position)
-
         return (
             0 <= position[0] < self.rows
             and 0 <= position[1] < self.cols
-            and cell.type != CellType.OBSTACLE
+            and self.flat_types[position[0] * self.cols + position[1]] != OBSTACLE
             and self.fuel > 0
         )
 
@@ -195,15 +256,171 @@ class CityMap:
         return position == (goal[0], goal[1])
 
     def __str__(self) -> str:
-        return f"CityMap({self.rows}, {self.cols}, {self.delivery_time}, {self.fuel_capacity}, {self.start}, {self.goal}, {self.grid})"
+        return f"CityMap({self.rows}, {self.cols}, {self.delivery_time}, {self.fuel_capacity}, {self.start}, {self.goal}, {self.cell_types.tolist()})"
 
     def get_cost(self, next: Tuple[int, int]) -> int:
-        next_cell = self.get_cell(next)
-        if next_cell.type == CellType.TOLL_ROAD:
-            return next_cell.value + 1
-        if next_cell.type == CellType.FUEL_STATION:
-            return next_cell.value + 1
+        if (0 <= next[0] < self.rows) and (0 <= next[1] < self.cols):
+            k = next[0] * self.cols + next[1]
+            cell_type = self.flat_types[k]
+            if cell_type == TOLL_ROAD or cell_type == FUEL_STATION:
+                return self.flat_values[k] + 1
         return 1
 
     def refuel(self):
         self.fuel = self.fuel_capacity
+
+    def to_index(self, position: Tuple[int, int]) -> int:
+        return position[0] * self.cols + position[1]
+
+    def to_position(self, index: int) -> Tuple[int, int]:
+        return divmod(index, self.cols)
+
+    def get_neighbor_table(self) -> Tuple[List[Tuple[int, ...]], List[int]]:
+        """
+        Return (neighbors, step_costs), both indexed by flat cell index:
+        neighbors[k] lists the passable cells reachable from k in DIRECTIONS
+        order, and step_costs[k] is the cost of moving into k (`get_cost`),
+        so the cost of edge k -> n is step_costs[n].
+        """
+        if self.neighbor_table is None:
+            self.neighbor_table, self.step_costs = self.compute_neighbor_table()
+        return self.neighbor_table, self.step_costs
+
+    def get_goal_distances(
+        self,
+        goal: Tuple[int, int],
+        start: Tuple[int, int],
+        limit: float = float("inf"),
+        stats: Optional[Dict[str, int]] = None,
+    ) -> List[float]:
+        """
+        Return, flattened by cell index, a consistent lower bound on the cost
+        from each cell to `goal`, exact on every cell that a cheapest route
+        from `start` can use.
+
+        It runs a reverse A* from the goal towards the start (Manhattan
+        distance to the start as heuristic). The search stops when it settles
+        the start, or once its estimate exceeds `limit` and the start is thus
+        out of reach within `limit`. Settled cells get their exact distance.
+        Every other cell has exact distance + distance from start >= the
+        estimate f where the search stopped, so it gets
+        max(Manhattan distance to goal, f - Manhattan distance to start), or
+        infinity if the whole reachable area was settled.
+
+        Results are cached: the distances stay valid for any limit once the
+        start is settled. stats["reverse_expansions"] counts the cells this
+        call settled (0 from the cache).
+        """
+        goal_index = self.to_index(goal)
+        start_index = self.to_index(start)
+        key = (goal_index, start_index)
+        cached = self.goal_distances.get(key)
+        if cached is not None and cached[0] >= limit:
+            if stats is not None:
+                stats["reverse_expansions"] = 0
+            return cached[1]
+
+        neighbors, step_costs = self.get_neighbor_table()
+        rows, cols = self.rows, self.cols
+        start_row, start_col = start
+        goal_row, goal_col = goal
+        dist = [float("inf")] * (rows * cols)
+        dist[goal_index] = 0
+        settled = bytearray(rows * cols)
+        queue = [(abs(goal_row - start_row) + abs(goal_col - start_col), goal_index)]
+        bound = float("inf")  # Exact distance + distance from start, elsewhere
+        while queue:
+            f, current = heapq.heappop(queue)
+            if settled[current]:
+                continue
+            if f > limit:
+                bound = f
+                break
+            settled[current] = 1
+            if current == start_index:
+                bound, limit = f, float("inf")
+                break
+            # Moving from a neighbor into `current` costs step_costs[current]
+            new_dist = dist[current] + step_costs[current]
+            for neighbor in neighbors[current]:
+                if new_dist < dist[neighbor]:
+                    dist[neighbor] = new_dist
+                    row, col = divmod(neighbor, cols)
+                    f = new_dist + abs(row - start_row) + abs(col - start_col)
+                    heapq.heappush(queue, (f, neighbor))
+
+        row, col = np.divmod(np.arange(rows * cols), cols)
+        lower = np.maximum(
+            np.abs(row - goal_row) + np.abs(col - goal_col),
+            bound - (np.abs(row - start_row) + np.abs(col - start_col)),
+        )
+        is_settled = np.frombuffer(settled, dtype=np.uint8).astype(bool)
+        if bound == float("inf"):
+            lower = np.inf
+        dist = np.where(is_settled, np.array(dist), lower).tolist()
+
+        self.goal_distances[key] = (limit, dist)
+        if stats is not None:
+            stats["reverse_expansions"] = int(is_settled.sum())
+        return dist
+
+    def compute_neighbor_table(self) -> Tuple[List[Tuple[int, ...]], List[int]]:
+        rows, cols = self.rows, self.cols
+        index = np.arange(rows * cols).reshape(rows, cols)
+        passable = self.cell_types != OBSTACLE
+        targets = np.full((rows, cols, len(DIRECTIONS)), -1, dtype=np.int64)
+        for d, (dr, dc) in enumerate(DIRECTIONS):
+            # Cells whose move in this direction stays on the map
+            source = (
+                slice(max(0, -dr), rows - max(0, dr)),
+                slice(max(0, -dc), cols - max(0, dc)),
+            )
+            target = (
+                slice(max(0, dr), rows + min(0, dr)),
+                slice(max(0, dc), cols + min(0, dc)),
+            )
+            targets[source + (d,)] = np.where(passable[target], index[target], -1)
+        targets[~passable] = -1
+
+        neighbors = [
+            tuple([k for k in row if k >= 0])
+            for row in targets.reshape(-1, len(DIRECTIONS)).tolist()
+        ]
+        paid = (self.cell_types == TOLL_ROAD) | (self.cell_types == FUEL_STATION)
+        step_costs = np.where(paid, self.cell_values.astype(np.int64) + 1, 1)
+        return neighbors, step_costs.ravel().tolist()
+
+    def get_fuel_distances(self, goal: Tuple[int, int]) -> List[float]:
+        """
+        Return, flattened by cell index, the Manhattan distance from each cell
+        to the nearest fuel station or to `goal` (obstacles ignored). A route
+        needs at least that much fuel left to get anywhere useful.
+        """
+        goal_index = self.to_index(goal)
+        if goal_index not in self.fuel_distances:
+            sources = self.cell_types == FUEL_STATION
+            sources[goal] = True
+            distances = manhattan_distance_transform(sources)
+            self.fuel_distances[goal_index] = distances.ravel().tolist()
+        return self.fuel_distances[goal_index]
+
+
+def manhattan_distance_transform(sources: np.ndarray) -> np.ndarray:
+    # Manhattan distance to the nearest True cell, infinite without any. The
+    # L1 distance is separable, so it is computed as a 1D transform along the
+    # columns followed by one along the rows.
+    dist = np.where(sources, 0.0, np.inf)
+    for axis in (0, 1):
+        index = np.arange(dist.shape[axis], dtype=float)
+        index = index[:, None] if axis == 0 else index[None, :]
+        # d'[j] = min over k of (d[k] + |j - k|), forward then backward
+        forward = np.minimum.accumulate(dist - index, axis=axis) + index
+        backward = (
+            np.flip(
+                np.minimum.accumulate(np.flip(dist + index, axis), axis=axis),
+                axis,
+            )
+            - index
+        )
+        dist = np.minimum(forward, backward)
+    return dist
@@ -0,0 +1,27 @@
+from search_algorithms import a_star, bfs, dfs, gbfs, jps, ucs
+
+# Algorithms run on each single-agent level, in the order they are shown
+LEVEL_ALGORITHMS = {
+    1: {
+        "BFS": bfs.bfs,
+        "DFS": dfs.dfs,
+        "UCS": ucs.ucs,
+        "GBFS": gbfs.gbfs,
+        "AStar": a_star.a_star,
+        "JPS": jps.jps,
+    },
+    2: {
+        "AStar": a_star.a_star,
+    },
+    3: {
+        "AStar": a_star.a_star,
+    },
+}
+
+
+def run_algorithm(algorithm, city_map, level: int, stats=None):
+    # Search from the map's start to its goal; only A* takes the level
+    start, goal = city_map.start, city_map.goal
+    if level == 1:
+        return algorithm(city_map, start, goal, stats=stats)
+    return algorithm(city_map, start, goal, level, stats=stats)
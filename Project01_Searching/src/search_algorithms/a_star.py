@@ -1,7 +1,8 @@
-from citymap import CityMap, CellType
-from utils import reconstruct_path, DIRECTIONS, heuristic
+from array import array
+from citymap import CityMap, FUEL_STATION
+from utils import reconstruct_index_path, heuristic
 import heapq
-from typing import Dict, Set, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 
 def a_star(
@@ -10,63 +11,208 @@ def a_star(
     goal: Tuple[int, int] = None,
     level: int = 1,
     multi_agent: bool = False,
+    stats: Optional[Dict[str, int]] = None,
 ) -> List[Tuple[int, int]]:
     if start is None:
         start = city_map.start
     if goal is None:
         goal = city_map.goal
 
-    frontier: List[Tuple[int, Tuple[int, int], int]] = [
-        (0, start, city_map.fuel if level >= 3 else 0)
-    ]
-    visited: Set[Tuple[int, int, int]] = set()
-    parent: Dict[Tuple[int, int], Tuple[int, int]] = {start: None}
-    g_cost: Dict[Tuple[int, int], int] = {start: 0}
+    if level >= 3:
+        return label_setting_search(city_map, start, goal, stats)
+
+    neighbors, step_costs = city_map.get_neighbor_table()
+    cols = city_map.cols
+    start_index = city_map.to_index(start)
+    goal_index = city_map.to_index(goal)
+    size = city_map.rows * cols
+
+    # Level 2: nodes with g + h above the delivery time are dropped when
+    # generated. h is the distance to the goal from a reverse search bounded
+    # by the delivery time: exact on every node that is kept, so A* expands
+    # little more than the cheapest routes. The reverse search is paid up
+    # front and reported as stats["reverse_expansions"].
+    bounded = level == 2
+    if bounded:
+        deadline = city_map.delivery_time
+        goal_distances = city_map.get_goal_distances(goal, start, deadline, stats)
+        if goal_distances[start_index] > deadline:
+            # No route meets the deadline: the reverse search alone proves it,
+            # and the forward search fails without expanding anything
+            if stats is not None:
+                stats["expansions"] = 0
+                stats["pruned"] = 0
+            return []
+
+    # (f, tie, cell): with the exact bound, ties go to the cell nearest the goal
+    frontier: List[Tuple[int, int, int]] = [(0, 0, start_index)]
+    visited: List[bool] = [False] * size
+    parent: List[int] = [-1] * size
+    g_cost: List[float] = [float("inf")] * size
+    g_cost[start_index] = 0
+    expansions = 0
+    pruned = 0
+    path: List[Tuple[int, int]] = []
 
     while frontier:
-        _, current, current_fuel = heapq.heappop(frontier)
-
-        if (multi_agent and city_map.is_goal_multi_agents(current, goal)) or (
-            not multi_agent and city_map.is_goal(current)
-        ):
-            if level >= 2:
-                if g_cost[current] <= city_map.delivery_time:
-                    return reconstruct_path(parent, start, goal)
+        _, _, current = heapq.heappop(frontier)
+
+        if current == goal_index:
+            if not bounded or g_cost[current] <= deadline:
+                path = reconstruct_index_path(parent, start_index, goal_index, cols)
+            break
+
+        if visited[current]:
+            continue
+
+        visited[current] = True
+        expansions += 1
+
+        for next_cell in neighbors[current]:
+            tentative_g_cost = g_cost[current] + step_costs[next_cell]
+            if tentative_g_cost < g_cost[next_cell]:
+                if bounded:
+                    tie = goal_distances[next_cell]
+                    f_cost = tentative_g_cost + tie
+                    if f_cost > deadline:
+                        pruned += 1
+                        continue
                 else:
-                    return []
-            return reconstruct_path(parent, start, goal)
+                    tie = 0
+                    f_cost = tentative_g_cost + heuristic(
+                        divmod(next_cell, cols), goal, city_map
+                    )
+                g_cost[next_cell] = tentative_g_cost
+                heapq.heappush(frontier, (f_cost, tie, next_cell))
+                parent[next_cell] = current
+
+    if stats is not None:
+        stats["expansions"] = expansions
+        if bounded:
+            stats["pruned"] = pruned
+
+    return path
+
+
+def label_setting_search(
+    city_map: CityMap,
+    start: Tuple[int, int],
+    goal: Tuple[int, int],
+    stats: Optional[Dict[str, int]] = None,
+) -> List[Tuple[int, int]]:
+    """
+    Level 3 and above: fastest route under both the fuel and the delivery
+    time constraints.
+
+    A state is a label (cell, time, fuel). Every move burns one unit of fuel,
+    a fuel station fills the tank up again. A label is dominated when another
+    label on the same cell has no more time and no less fuel; dominated
+    labels are dropped, so each cell keeps a Pareto front of at most
+    fuel_capacity + 1 labels. Labels are expanded by time + exact distance to
+    the goal, so the first one reaching the goal has the minimum time; labels
+    that cannot reach the goal within the delivery time, or with too little
+    fuel to reach a fuel station or the goal, are never created.
+    Labels live in parallel arrays, each with a pointer to its parent label.
+    """
+    neighbors, step_costs = city_map.get_neighbor_table()
+    cols = city_map.cols
+    flat_types = city_map.flat_types
+    capacity = city_map.fuel_capacity
+    start_index = city_map.to_index(start)
+    goal_index = city_map.to_index(goal)
+    deadline = city_map.delivery_time
+    goal_distances = city_map.get_goal_distances(goal, start, deadline, stats)
+    fuel_distances = city_map.get_fuel_distances(goal)
+    if goal_distances[start_index] > deadline:
+        if stats is not None:
+            stats["expansions"] = stats["labels"] = stats["pruned"] = 0
+        return []
+
+    # Label storage: cell, time, fuel and parent label of label i
+    label_cell = array("l", [start_index])
+    label_time = array("l", [0])
+    label_fuel = array("l", [city_map.fuel])
+    label_parent = array("l", [-1])
+    dominated = bytearray(1)
+    # Pareto front (label ids) of each cell reached so far
+    fronts: Dict[int, List[int]] = {start_index: [0]}
+
+    # (f, -time, label): among equal f, the label nearest the goal goes first
+    frontier: List[Tuple[int, int, int]] = [(0, 0, 0)]
+    expansions = 0
+    pruned = 0
+    found = -1
 
-        if (current, current_fuel) in visited:
+    while frontier:
+        _, time, label = heapq.heappop(frontier)
+        time = -time
+        if dominated[label]:
             continue
 
-        visited.add((current, current_fuel))
+        current = label_cell[label]
+        if current == goal_index:
+            found = label
+            break
 
-        for direction in DIRECTIONS:
-            next_cell = (current[0] + direction[0], current[1] + direction[1])
-            if city_map.is_valid_move(next_cell):
-                next_fuel = current_fuel - 1 if level >= 3 else current_fuel
-                if next_fuel < 0:
-                    continue  # Not enough fuel to move to the next cell
+        expansions += 1
+        fuel = label_fuel[label] - 1  # Fuel left after the next move
+        if fuel < 0:
+            continue  # Not enough fuel to move to the next cell
 
-                tentative_g_cost = g_cost[current] + city_map.get_cost(next_cell)
-                if (
-                    city_map.get_cell(next_cell).type == CellType.FUEL_STATION
-                    and level >= 3
-                ):
-                    next_fuel = city_map.fuel_capacity  # Refill fuel
+        for next_cell in neighbors[current]:
+            next_time = time + step_costs[next_cell]
+            f_cost = next_time + goal_distances[next_cell]
+            if f_cost > deadline:
+                pruned += 1
+                continue
+            next_fuel = capacity if flat_types[next_cell] == FUEL_STATION else fuel
+            if next_fuel < fuel_distances[next_cell]:
+                pruned += 1  # Runs dry before a fuel station or the goal
+                continue
 
-                if next_cell not in g_cost or tentative_g_cost < g_cost[next_cell]:
-                    g_cost[next_cell] = tentative_g_cost
-                    f_cost = tentative_g_cost + heuristic(
-                        next_cell, goal, city_map, level, next_fuel
-                    )
-                    heapq.heappush(
-                        frontier,
-                        (f_cost, next_cell, next_fuel),
-                    )
-                    parent[next_cell] = current
+            front = fronts.get(next_cell)
+            if front is None:
+                front = fronts[next_cell] = []
+            elif any(
+                label_time[other] <= next_time and label_fuel[other] >= next_fuel
+                for other in front
+            ):
+                continue
+
+            # Drop the labels of this cell that the new one dominates
+            kept = []
+            for other in front:
+                if label_time[other] >= next_time and label_fuel[other] <= next_fuel:
+                    dominated[other] = 1
+                else:
+                    kept.append(other)
+
+            new_label = len(label_cell)
+            label_cell.append(next_cell)
+            label_time.append(next_time)
+            label_fuel.append(next_fuel)
+            label_parent.append(label)
+            dominated.append(0)
+            kept.append(new_label)
+            fronts[next_cell] = kept
+
+            heapq.heappush(frontier, (f_cost, -next_time, new_label))
+
+    if stats is not None:
+        stats["expansions"] = expansions
+        stats["labels"] = len(label_cell)
+        stats["pruned"] = pruned
+
+    if found == -1 or label_time[found] > city_map.delivery_time:
+        return []
+
+    path: List[Tuple[int, int]] = []
+    while found != -1:
+        path.append(divmod(label_cell[found], cols))
+        found = label_parent[found]
+    path.reverse()
 
-    return []
+    return path
 
 
 # Now, you can use this generalized A* function for different levels:
@@ -1,30 +1,40 @@
 from collections import deque
 from citymap import CityMap
-from utils import reconstruct_path, DIRECTIONS
+from utils import reconstruct_index_path
 
-from typing import Dict, Tuple, List, Set
+from typing import Dict, List, Optional, Tuple
 
 
 def bfs(
-    city_map: CityMap, start: Tuple[int, int], goal: Tuple[int, int]
+    city_map: CityMap,
+    start: Tuple[int, int],
+    goal: Tuple[int, int],
+    stats: Optional[Dict[str, int]] = None,
 ) -> List[Tuple[int, int]]:
-    frontier = deque([start])
+    neighbors, _ = city_map.get_neighbor_table()
+    start_index = city_map.to_index(start)
+    goal_index = city_map.to_index(goal)
 
-    visited: Set[Tuple[int, int]] = set()
-    visited.add(start)
-    parent: Dict[Tuple[int, int], Tuple[int, int]] = {start: None}
+    frontier = deque([start_index])
+
+    # parent[k] == -1 marks cells not visited yet
+    parent: List[int] = [-1] * (city_map.rows * city_map.cols)
+    parent[start_index] = start_index
+    expansions = 0
 
     while frontier:
         current = frontier.popleft()
 
-        if city_map.is_goal(current):
-            return reconstruct_path(parent, start, goal)
+        if current == goal_index:
+            break
 
-        for direction in DIRECTIONS:
-            next_cell = (current[0] + direction[0], current[1] + direction[1])
-            if city_map.is_valid_move(next_cell) and next_cell not in visited:
+        expansions += 1
+        for next_cell in neighbors[current]:
+            if parent[next_cell] == -1:
                 frontier.append(next_cell)
-                visited.add(next_cell)
                 parent[next_cell] = current
 
-    return reconstruct_path(parent, start, goal)
+    if stats is not None:
+        stats["expansions"] = expansions
+
+    return reconstruct_index_path(parent, start_index, goal_index, city_map.cols)
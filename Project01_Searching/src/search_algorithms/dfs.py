@@ -1,35 +1,37 @@
 from citymap import CityMap
-from utils import reconstruct_path, DIRECTIONS
-from typing import Dict, Set, List, Tuple
+from utils import reconstruct_index_path
+from typing import Dict, List, Optional, Tuple
 
 
 def dfs(
-    city_map: CityMap, start: Tuple[int, int], goal: Tuple[int, int]
+    city_map: CityMap,
+    start: Tuple[int, int],
+    goal: Tuple[int, int],
+    stats: Optional[Dict[str, int]] = None,
 ) -> List[Tuple[int, int]]:
-    stack: List[Tuple[int, int]] = [start]
-    parent: Dict[Tuple[int, int], Tuple[int, int]] = {start: None}
-    visited: Set[Tuple[int, int]] = set()
-    visited.add(start)
+    neighbors, _ = city_map.get_neighbor_table()
+    start_index = city_map.to_index(start)
+    goal_index = city_map.to_index(goal)
+
+    stack: List[int] = [start_index]
+    # parent[k] == -1 marks cells not visited yet
+    parent: List[int] = [-1] * (city_map.rows * city_map.cols)
+    parent[start_index] = start_index
+    expansions = 0
 
     while stack:
-        current: Tuple[int, int] = stack.pop()
-
-        if city_map.is_goal(current):
-            return reconstruct_path(parent, start, goal)
-
-        for direction in DIRECTIONS:
-            neighbor: Tuple[int, int] = (
-                current[0] + direction[0],
-                current[1] + direction[1],
-            )
-
-            if (
-                city_map.is_valid_move(neighbor)
-                and neighbor not in parent
-                and neighbor not in visited
-            ):
+        current: int = stack.pop()
+
+        if current == goal_index:
+            break
+
+        expansions += 1
+        for neighbor in neighbors[current]:
+            if parent[neighbor] == -1:
                 stack.append(neighbor)
                 parent[neighbor] = current
-                visited.add(neighbor)
 
-    return reconstruct_path(parent, start, goal)
+    if stats is not None:
+        stats["expansions"] = expansions
+
+    return reconstruct_index_path(parent, start_index, goal_index, city_map.cols)
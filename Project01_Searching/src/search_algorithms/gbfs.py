@@ -1,33 +1,50 @@
 from citymap import CityMap
-from utils import reconstruct_path, DIRECTIONS, heuristic
-from typing import Dict, Set, List, Tuple
+from utils import reconstruct_index_path, heuristic
+from typing import Dict, List, Optional, Tuple
 import heapq
 
 
 def gbfs(
-    city_map: CityMap, start: Tuple[int, int], goal: Tuple[int, int]
+    city_map: CityMap,
+    start: Tuple[int, int],
+    goal: Tuple[int, int],
+    stats: Optional[Dict[str, int]] = None,
 ) -> List[Tuple[int, int]]:
-    frontier: List[Tuple[int, Tuple[int, int]]] = [(0, start)]
-    visited: Set[Tuple[int, int]] = set()
-    parent: Dict[Tuple[int, int], Tuple[int, int]] = {start: None}
+    neighbors, _ = city_map.get_neighbor_table()
+    cols = city_map.cols
+    start_index = city_map.to_index(start)
+    goal_index = city_map.to_index(goal)
+    size = city_map.rows * cols
+
+    frontier: List[Tuple[int, int]] = [(0, start_index)]
+    visited: List[bool] = [False] * size
+    parent: List[int] = [-1] * size
+    expansions = 0
 
     while frontier:
         _, current = heapq.heappop(frontier)
 
-        if city_map.is_goal(current):
-            return reconstruct_path(parent, start, goal)
+        if current == goal_index:
+            break
 
-        if current in visited:
+        if visited[current]:
             continue
 
-        visited.add(current)
+        visited[current] = True
+        expansions += 1
 
-        for direction in DIRECTIONS:
-            next_cell = (current[0] + direction[0], current[1] + direction[1])
-            if city_map.is_valid_move(next_cell) and next_cell not in visited:
+        for next_cell in neighbors[current]:
+            if not visited[next_cell]:
                 heapq.heappush(
-                    frontier, (heuristic(next_cell, goal, city_map=city_map), next_cell)
+                    frontier,
+                    (
+                        heuristic(divmod(next_cell, cols), goal, city_map=city_map),
+                        next_cell,
+                    ),
                 )
                 parent[next_cell] = current
 
-    return reconstruct_path(parent, start, goal)
+    if stats is not None:
+        stats["expansions"] = expansions
+
+    return reconstruct_index_path(parent, start_index, goal_index, cols)
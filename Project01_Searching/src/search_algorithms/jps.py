@@ -0,0 +1,163 @@
+"""
+Jump Point Search for 4-connected grids.
+
+On cells where every move costs 1, many equal-cost paths are symmetric.
+JPS only expands "jump points" found by scanning straight lines: moving
+horizontally, a scan stops where a vertical side opens up (forced neighbor);
+moving vertically, it also stops where a horizontal scan from the current
+cell finds a jump point. All other cells are skipped, which cuts expansions
+on open maps by a large factor while keeping paths optimal.
+
+Toll roads and fuel stations break the uniform cost. Scans treat them as
+walls for pruning and stop on them and on every cell next to them; these
+cells are then expanded in all four directions, like plain A*.
+"""
+
+from citymap import CityMap, CellType, OBSTACLE
+from utils import heuristic
+import heapq
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+def jps(
+    city_map: CityMap,
+    start: Tuple[int, int],
+    goal: Tuple[int, int],
+    stats: Optional[Dict[str, int]] = None,
+) -> List[Tuple[int, int]]:
+    rows, cols = city_map.rows, city_map.cols
+    _, step_costs = city_map.get_neighbor_table()
+    start_index = city_map.to_index(start)
+    goal_index = city_map.to_index(goal)
+    size = rows * cols
+
+    # uniform: passable cells costing 1 to enter, where scans may run through
+    # stop: cells where every scan stops (non-uniform cells, their
+    # neighbors and the goal); they are expanded without pruning
+    types = city_map.cell_types
+    passable = types != OBSTACLE
+    uniform_grid = passable & (types != CellType.TOLL_ROAD.value)
+    uniform_grid &= types != CellType.FUEL_STATION.value
+    special = passable & ~uniform_grid
+    stop_grid = special.copy()
+    stop_grid[1:, :] |= special[:-1, :]
+    stop_grid[:-1, :] |= special[1:, :]
+    stop_grid[:, 1:] |= special[:, :-1]
+    stop_grid[:, :-1] |= special[:, 1:]
+    stop_grid &= passable
+    uniform: List[bool] = uniform_grid.ravel().tolist()
+    stop: List[bool] = stop_grid.ravel().tolist()
+    stop[goal_index] = True
+    open_cell: List[bool] = passable.ravel().tolist()
+
+    def walkable(r: int, c: int) -> bool:
+        return 0 <= r < rows and 0 <= c < cols and uniform[r * cols + c]
+
+    def jump_horizontal(r: int, c: int, dc: int) -> int:
+        while 0 <= c < cols:
+            k = r * cols + c
+            if not open_cell[k]:
+                return -1
+            if stop[k]:
+                return k
+            if (walkable(r - 1, c) and not walkable(r - 1, c - dc)) or (
+                walkable(r + 1, c) and not walkable(r + 1, c - dc)
+            ):
+                return k
+            c += dc
+        return -1
+
+    def jump_vertical(r: int, c: int, dr: int) -> int:
+        while 0 <= r < rows:
+            k = r * cols + c
+            if not open_cell[k]:
+                return -1
+            if stop[k]:
+                return k
+            if (walkable(r, c - 1) and not walkable(r - dr, c - 1)) or (
+                walkable(r, c + 1) and not walkable(r - dr, c + 1)
+            ):
+                return k
+            # A horizontal jump point reachable from here makes this cell one
+            if (
+                jump_horizontal(r, c + 1, 1) != -1
+                or jump_horizontal(r, c - 1, -1) != -1
+            ):
+                return k
+            r += dr
+        return -1
+
+    frontier: List[Tuple[int, int]] = [(0, start_index)]
+    parent: List[int] = [-1] * size
+    g_cost: List[float] = [float("inf")] * size
+    g_cost[start_index] = 0
+    closed: List[bool] = [False] * size
+    expansions = 0
+
+    while frontier:
+        _, current = heapq.heappop(frontier)
+
+        if current == goal_index:
+            break
+
+        if closed[current]:
+            continue
+
+        closed[current] = True
+        expansions += 1
+        r, c = divmod(current, cols)
+
+        # Directions to scan: all of them from the start and stop cells,
+        # otherwise the natural and forced ones for the incoming direction
+        if current == start_index or stop[current]:
+            directions = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+        else:
+            pr, pc = divmod(parent[current], cols)
+            dr = (r > pr) - (r < pr)
+            dc = (c > pc) - (c < pc)
+            if dc != 0:
+                directions = [(-1, 0), (1, 0), (0, dc)]
+            else:
+                directions = [(0, -1), (0, 1), (dr, 0)]
+
+        for dr, dc in directions:
+            if dr == 0:
+                jump_point = jump_horizontal(r, c + dc, dc)
+            else:
+                jump_point = jump_vertical(r + dr, c, dr)
+            if jump_point == -1:
+                continue
+
+            # Straight segment: uniform cells, then the jump point itself
+            jr, jc = divmod(jump_point, cols)
+            distance = abs(jr - r) + abs(jc - c)
+            new_cost = g_cost[current] + distance - 1 + step_costs[jump_point]
+            if new_cost < g_cost[jump_point]:
+                g_cost[jump_point] = new_cost
+                parent[jump_point] = current
+                f_cost = new_cost + heuristic((jr, jc), goal, city_map)
+                heapq.heappush(frontier, (f_cost, jump_point))
+
+    if stats is not None:
+        stats["expansions"] = expansions
+
+    if goal_index != start_index and parent[goal_index] == -1:
+        return []
+
+    # Fill in the cells between consecutive jump points
+    jump_points = [goal_index]
+    while jump_points[-1] != start_index:
+        jump_points.append(parent[jump_points[-1]])
+    jump_points.reverse()
+
+    path: List[Tuple[int, int]] = [start]
+    for a, b in zip(jump_points, jump_points[1:]):
+        (ar, ac), (br, bc) = divmod(a, cols), divmod(b, cols)
+        dr, dc = (br > ar) - (br < ar), (bc > ac) - (bc < ac)
+        while (ar, ac) != (br, bc):
+            ar, ac = ar + dr, ac + dc
+            path.append((ar, ac))
+
+    return path
@@ -1,35 +1,47 @@
 from citymap import CityMap
-from utils import reconstruct_path, DIRECTIONS
+from utils import reconstruct_index_path
 import heapq
-from typing import Dict, Set, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 
 def ucs(
-    city_map: CityMap, start: Tuple[int, int], goal: Tuple[int, int]
+    city_map: CityMap,
+    start: Tuple[int, int],
+    goal: Tuple[int, int],
+    stats: Optional[Dict[str, int]] = None,
 ) -> list[tuple]:
-    frontier: List[Tuple[int, Tuple[int, int]]] = [(0, start)]
-    visited: Set[Tuple[int, int]] = set()
-    parent: Dict[Tuple[int, int], Tuple[int, int]] = {start: None}
-    cost: Dict[Tuple[int, int], int] = {start: 0}
+    neighbors, step_costs = city_map.get_neighbor_table()
+    start_index = city_map.to_index(start)
+    goal_index = city_map.to_index(goal)
+    size = city_map.rows * city_map.cols
+
+    frontier: List[Tuple[int, int]] = [(0, start_index)]
+    visited: List[bool] = [False] * size
+    parent: List[int] = [-1] * size
+    expansions = 0
+    cost: List[float] = [float("inf")] * size
+    cost[start_index] = 0
 
     while frontier:
         current_cost, current = heapq.heappop(frontier)
 
-        if city_map.is_goal(current):
-            return reconstruct_path(parent, start, goal)
+        if current == goal_index:
+            break
 
-        if current in visited:
+        if visited[current]:
             continue
 
-        visited.add(current)
+        visited[current] = True
+        expansions += 1
 
-        for direction in DIRECTIONS:
-            next_cell = (current[0] + direction[0], current[1] + direction[1])
-            if city_map.is_valid_move(next_cell):
-                new_cost = current_cost + city_map.get_cost(next_cell)
-                if next_cell not in cost or new_cost < cost[next_cell]:
-                    cost[next_cell] = new_cost
-                    heapq.heappush(frontier, (new_cost, next_cell))
-                    parent[next_cell] = current
+        for next_cell in neighbors[current]:
+            new_cost = current_cost + step_costs[next_cell]
+            if new_cost < cost[next_cell]:
+                cost[next_cell] = new_cost
+                heapq.heappush(frontier, (new_cost, next_cell))
+                parent[next_cell] = current
 
-    return reconstruct_path(parent, start, goal)
+    if stats is not None:
+        stats["expansions"] = expansions
+
+    return reconstruct_index_path(parent, start_index, goal_index, city_map.cols)
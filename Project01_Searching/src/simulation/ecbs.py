@@ -0,0 +1,274 @@
+"""
+Enhanced CBS (ECBS): bounded-suboptimal multi-agent planning.
+
+Optimal CBS explodes as agents and congestion grow. ECBS accepts any joint
+plan whose sum of costs is at most w times the optimum, and uses that slack
+at both levels with focal search:
+
+- Low level: OPEN is ordered by f as in A*; FOCAL holds the OPEN states with
+  f <= w * min f, ordered by the number of conflicts with the other agents'
+  paths. Each search returns its path and a lower bound on the agent's
+  optimal cost (min f when the goal was selected).
+- High level: OPEN is ordered by the sum of those lower bounds (LB); FOCAL
+  holds the nodes with cost <= w * min LB, ordered by number of conflicts.
+
+When a conflict-free node is selected, cost / min LB is the bound actually
+achieved, usually well below w.
+
+Usage (at `src` directory):
+    python -m simulation.ecbs ../data/input/input5_level4.txt output.txt --w 1.2
+"""
+
+import argparse
+import heapq
+from itertools import count
+
+from simulation.multiple_agents import (
+    CBS,
+    MOVE_SHIFT,
+    UNREACHABLE,
+    Constraints,
+    HighLevelNode,
+    Environment,
+    load_environment,
+    write_output,
+)
+
+
+def focal_search(env: Environment, agent_name: str, w: float):
+    """
+    Space-time focal search for one agent under env.constraints.
+
+    Returns (path, lower bound on the cost of the agent's optimal path), or
+    (False, inf) when no path exists within the time horizon. Costs are
+    path lengths, as in Environment.compute_solution_cost.
+    """
+    cells = env.num_cells
+    neighbor_table = env.neighbor_table
+    vertex_constraints = env.constraints.vertex_constraints
+    edge_constraints = env.constraints.edge_constraints
+    start = env.to_cell(env.agent_dict[agent_name]["start"].location)
+    goal = env.to_cell(env.agent_dict[agent_name]["goal"].location)
+    heuristic = env.distance_maps[agent_name].__getitem__
+    goal_time, horizon = env.get_time_limits(agent_name)
+    if heuristic(start) == UNREACHABLE:
+        return False, float("inf")
+
+    # OPEN: f of each open state, and the open states bucketed by f
+    open_f = {start: heuristic(start)}
+    buckets = {open_f[start]: {start}}
+    f_values = [open_f[start]]  # Heap of the f values in buckets
+    conflicts = {start: env.count_conflicts(0, start)}
+    came_from = {}
+    closed_set = set()
+
+    f_min = open_f[start]
+    bound = w * f_min
+    # FOCAL: (conflicts, f, -time, state), stale entries are skipped
+    focal = [(conflicts[start], f_min, 0, start)]
+
+    def add_open(key, f):
+        open_f[key] = f
+        if f not in buckets:
+            buckets[f] = set()
+            heapq.heappush(f_values, f)
+        buckets[f].add(key)
+        if f <= bound:
+            heapq.heappush(focal, (conflicts[key], f, -(key // cells), key))
+
+    while open_f:
+        current_conflicts, f, _, current = heapq.heappop(focal)
+        if current not in open_f or current_conflicts != conflicts[current]:
+            continue
+
+        time, cell = divmod(current, cells)
+        if cell == goal and time >= goal_time:
+            path = [current]
+            while path[-1] in came_from:
+                path.append(came_from[path[-1]])
+            # A path of arrival time t has t + 1 states
+            return [env.to_state(key) for key in reversed(path)], f_min + 1
+
+        del open_f[current]
+        buckets[f].discard(current)
+        closed_set.add(current)
+
+        if time < horizon:
+            next_time = time + 1
+            blocked = vertex_constraints.get(next_time, ())
+            forbidden_moves = edge_constraints.get(time, ())
+            for next_cell in neighbor_table[cell]:
+                if next_cell in blocked:
+                    continue
+                if cell << MOVE_SHIFT | next_cell in forbidden_moves:
+                    continue
+                neighbor = next_time * cells + next_cell
+                if neighbor in closed_set:
+                    continue
+                tentative_conflicts = current_conflicts + env.count_conflicts(
+                    next_time, next_cell, cell
+                )
+                if tentative_conflicts >= conflicts.get(neighbor, float("inf")):
+                    continue
+                conflicts[neighbor] = tentative_conflicts
+                came_from[neighbor] = current
+                # g is the time, so a state's f never changes
+                add_open(neighbor, next_time + heuristic(next_cell))
+
+        # Raise the focal bound when the smallest f in OPEN grows
+        while f_values and not buckets[f_values[0]]:
+            del buckets[heapq.heappop(f_values)]
+        if f_values and f_values[0] > f_min:
+            f_min = f_values[0]
+            new_bound = w * f_min
+            for f in sorted(buckets):
+                if bound < f <= new_bound:
+                    for key in buckets[f]:
+                        heapq.heappush(focal, (conflicts[key], f, -(key // cells), key))
+            bound = new_bound
+
+    return False, float("inf")
+
+
+class ECBS(CBS):
+    def __init__(self, environment, w: float = 1.5):
+        if w < 1:
+            raise ValueError("The suboptimality factor w must be at least 1.")
+        super().__init__(environment)
+        self.w = w
+        self.lower_bound = 0  # Sum of costs of an optimal plan is at least this
+        self.suboptimality = None  # Bound achieved by the returned plan
+
+    def plan_agent(self, agent_name, solution):
+        self.env.constraints = self.env.constraint_dict.setdefault(
+            agent_name, Constraints()
+        )
+        self.env.set_conflict_avoidance(solution, agent_name)
+        return focal_search(self.env, agent_name, self.w)
+
+    def search(self):
+        env = self.env
+        start = HighLevelNode()
+        start.constraint_dict = {agent: Constraints() for agent in env.agent_dict}
+        env.constraint_dict = start.constraint_dict
+        start.solution = {}
+        start.lower_bounds = {}
+        for agent in env.agent_dict:
+            path, lower_bound = self.plan_agent(agent, start.solution)
+            if not path:
+                return {}
+            start.solution[agent] = path
+            start.lower_bounds[agent] = lower_bound
+        start.cost = env.compute_solution_cost(start.solution)
+
+        # OPEN by lower bound, FOCAL by conflicts; stale entries are skipped
+        order = count()
+        open_list = []
+        focal_list = []
+        open_nodes = {}  # order -> node still in OPEN
+
+        def push(node):
+            key = node.constraint_key()
+            if key in self.closed_set:
+                return
+            self.closed_set.add(key)
+            node.lower_bound = sum(node.lower_bounds.values())
+            node.conflicts = len(env.get_all_conflicts(node.solution))
+            node.order = next(order)
+            node.in_focal = False
+            open_nodes[node.order] = node
+            heapq.heappush(open_list, (node.lower_bound, node.order))
+            if node.cost <= self.w * self.lower_bound:
+                add_focal(node)
+
+        def add_focal(node):
+            node.in_focal = True
+            heapq.heappush(focal_list, (node.conflicts, node.cost, node.order))
+
+        push(start)
+        while open_nodes:
+            while open_list[0][1] not in open_nodes:
+                heapq.heappop(open_list)
+            # The focal bound follows the smallest LB currently in OPEN
+            min_lower_bound = open_list[0][0]
+            if min_lower_bound < self.lower_bound:
+                # Rebuild FOCAL with the nodes within the lower bound
+                focal_list.clear()
+                for node in open_nodes.values():
+                    node.in_focal = False
+                    if node.cost <= self.w * min_lower_bound:
+                        add_focal(node)
+            elif min_lower_bound > self.lower_bound:
+                # Admit the nodes now within the focal bound
+                for node in open_nodes.values():
+                    if not node.in_focal and node.cost <= self.w * min_lower_bound:
+                        add_focal(node)
+            self.lower_bound = min_lower_bound
+
+            # Every path costs at most w times its lower bound, so the node
+            # with the smallest LB is always in FOCAL
+            P = open_nodes.pop(heapq.heappop(focal_list)[-1])
+
+            env.constraint_dict = P.constraint_dict
+            conflict = env.get_first_conflict(P.solution)
+            if not conflict:
+                self.suboptimality = P.cost / self.lower_bound
+                return self.generate_plan(P.solution)
+
+            constraint_dict = env.create_constraints_from_conflict(conflict)
+            for agent in constraint_dict.keys():
+                new_node = HighLevelNode()
+                new_node.constraint_dict = dict(P.constraint_dict)
+                new_node.constraint_dict[agent] = P.constraint_dict[agent].copy()
+                new_node.constraint_dict[agent].add_constraint(constraint_dict[agent])
+
+                env.constraint_dict = new_node.constraint_dict
+                path, lower_bound = self.plan_agent(agent, P.solution)
+                if not path:
+                    continue
+                new_node.solution = dict(P.solution)
+                new_node.solution[agent] = path
+                new_node.lower_bounds = dict(P.lower_bounds)
+                # More constraints never lower the agent's optimal cost
+                new_node.lower_bounds[agent] = max(P.lower_bounds[agent], lower_bound)
+                new_node.cost = P.cost - len(P.solution[agent]) + len(path)
+                push(new_node)
+
+        return {}
+
+
+def ecbs(inputpath, outputpath, w: float = 1.5):
+    try:
+        with open(inputpath, "r") as param_file:
+            env = load_environment(param_file)
+            solver = ECBS(env, w)
+            solution = solver.search()
+
+            if not solution:
+                print("Solution not found")
+                return
+
+            print(
+                f"Sum of costs within {solver.suboptimality:.3f} of optimal"
+                f" (lower bound {solver.lower_bound}, w = {w})"
+            )
+            write_output(outputpath, solution)
+            return solution
+
+    except Exception as e:
+        print(f"Error processing the input file: {e}")
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("input", help="input file containing map and agents")
+    parser.add_argument("output", help="output file with the schedule")
+    parser.add_argument(
+        "--w", type=float, default=1.5, help="suboptimality factor (at least 1)"
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    ecbs(args.input, args.output, args.w)
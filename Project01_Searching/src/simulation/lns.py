@@ -0,0 +1,278 @@
+"""
+Large Neighborhood Search (MAPF-LNS): anytime improvement of a joint plan.
+
+Starting from a collision-free plan (prioritized planning, or ECBS when
+that fails), each iteration picks a neighborhood of agents, drops their
+paths and replans them one by one with space-time A* against the paths of
+all the other agents (see prioritized.py). The new paths are kept only when
+the sum of costs goes down, so the plan stays collision-free and never gets
+worse. Neighborhoods:
+
+- random: agents drawn uniformly.
+- collision: the most delayed agent (path longer than its distance to the
+  goal) and the agents whose paths cross its shortest path on the static
+  map, i.e. the ones it collides with when ignoring the others.
+- map: agents going through a random intersection and the cells around it,
+  where agents tend to wait for each other.
+
+Each improvement is recorded with the time it was found (history), giving
+the cost-over-time curve.
+
+Usage (at `src` directory):
+    python -m simulation.lns ../data/input/input5_level4.txt output.txt --time-limit 5
+"""
+
+import argparse
+import random
+import time
+from collections import deque
+
+from simulation.ecbs import ECBS
+from simulation.multiple_agents import (
+    Environment,
+    generate_plan,
+    load_environment,
+    write_output,
+)
+from simulation.prioritized import PrioritizedPlanner, ReservationTable, to_solution
+
+NEIGHBORHOODS = ("random", "collision", "map")
+
+
+class PathsECBS(ECBS):
+    # ECBS returning the State paths instead of the formatted plan
+    def generate_plan(self, solution):
+        return solution
+
+
+class LNS:
+    def __init__(
+        self,
+        environment: Environment,
+        neighborhood_size: int = 4,
+        neighborhoods=NEIGHBORHOODS,
+        seed: int = 0,
+    ):
+        for neighborhood in neighborhoods:
+            if neighborhood not in NEIGHBORHOODS:
+                raise ValueError(
+                    f"Unknown neighborhood {neighborhood!r},"
+                    f" expected one of {NEIGHBORHOODS}."
+                )
+        self.env = environment
+        self.neighborhood_size = neighborhood_size
+        self.neighborhoods = neighborhoods
+        self.random = random.Random(seed)
+        self.planner = PrioritizedPlanner(environment, seed=seed)
+        self.paths = None  # agent -> list of cells, one per timestep
+        self.history = []  # (seconds since start, sum of costs)
+        self.iterations = 0
+
+        # Cells where at least three ways meet, for the map neighborhood
+        self.intersections = [
+            cell
+            for cell, neighbors in enumerate(environment.neighbor_table)
+            if len(neighbors) > 3  # The cell itself (wait) and its exits
+        ]
+
+    def cost(self):
+        return sum(len(path) for path in self.paths.values())
+
+    def lower_bound(self):
+        # Every agent alone on the map, along its distance map
+        return sum(
+            self.env.distance_maps[agent][
+                self.env.to_cell(self.env.agent_dict[agent]["start"].location)
+            ]
+            + 1
+            for agent in self.env.agent_dict
+        )
+
+    def initial_paths(self):
+        paths = self.planner.find_paths()
+        if paths is not None:
+            return paths
+
+        solution = PathsECBS(self.env, 2.0).search()
+        if not solution:
+            return None
+        return {
+            agent: [self.env.to_cell(state.location) for state in path]
+            for agent, path in solution.items()
+        }
+
+    def random_neighborhood(self):
+        return self.random.sample(list(self.paths), self.neighborhood_size)
+
+    def collision_neighborhood(self):
+        env = self.env
+        delays = {
+            agent: len(path) - 1 - env.distance_maps[agent][path[0]]
+            for agent, path in self.paths.items()
+        }
+        delayed = [agent for agent, delay in delays.items() if delay > 0]
+        if not delayed:
+            return []
+        # Draw among the most delayed agents, so the same one is not retried
+        # forever when its delay cannot be reduced
+        delayed.sort(key=lambda agent: -delays[agent])
+        agent = self.random.choice(delayed[: self.neighborhood_size])
+
+        # Walk down the distance map from the start to the goal
+        distances = env.distance_maps[agent]
+        cell = self.paths[agent][0]
+        shortest_path = {cell}
+        while distances[cell] > 0:
+            cell = min(
+                (n for n in env.neighbor_table[cell] if n != cell),
+                key=lambda n: (distances[n], self.random.random()),
+            )
+            shortest_path.add(cell)
+
+        crossing = [
+            other
+            for other, path in self.paths.items()
+            if other != agent and not shortest_path.isdisjoint(path)
+        ]
+        size = min(self.neighborhood_size - 1, len(crossing))
+        return [agent] + self.random.sample(crossing, size)
+
+    def map_neighborhood(self):
+        if not self.intersections:
+            return []
+        env = self.env
+        visitors = {}  # cell -> agents going through it
+        for agent, path in self.paths.items():
+            for cell in set(path):
+                visitors.setdefault(cell, []).append(agent)
+
+        # Agents met breadth first around a random intersection
+        start = self.random.choice(self.intersections)
+        neighborhood = []
+        seen = {start}
+        queue = deque([start])
+        while queue and len(neighborhood) < self.neighborhood_size:
+            cell = queue.popleft()
+            for agent in visitors.get(cell, ()):
+                if agent not in neighborhood:
+                    neighborhood.append(agent)
+            for neighbor in env.neighbor_table[cell]:
+                if neighbor not in seen:
+                    seen.add(neighbor)
+                    queue.append(neighbor)
+        return neighborhood[: self.neighborhood_size]
+
+    def replan(self, neighborhood):
+        """
+        Replan the agents of the neighborhood, in random order, against the
+        others. Keep the new paths if they lower the sum of costs.
+        """
+        table = ReservationTable(self.env.num_cells)
+        for agent, path in self.paths.items():
+            if agent not in neighborhood:
+                table.reserve(path)
+
+        order = list(neighborhood)
+        self.random.shuffle(order)
+        new_paths = self.planner.plan(order, table)
+        if new_paths is None:
+            return False
+        old_cost = sum(len(self.paths[agent]) for agent in neighborhood)
+        new_cost = sum(len(path) for path in new_paths.values())
+        if new_cost >= old_cost:
+            return False
+        self.paths.update(new_paths)
+        return True
+
+    def search(self, time_limit: float = 5.0, max_iterations: int = None):
+        """
+        Improve the plan until time_limit seconds have passed, max_iterations
+        neighborhoods have been tried or the plan reaches the lower bound.
+        Return the plan, as cbs() does, or {} without an initial plan.
+        """
+        start_time = time.perf_counter()
+        self.paths = self.initial_paths()
+        if self.paths is None:
+            return {}
+        self.history = [(time.perf_counter() - start_time, self.cost())]
+        self.neighborhood_size = min(self.neighborhood_size, len(self.paths))
+
+        lower_bound = self.lower_bound()
+        builders = {
+            "random": self.random_neighborhood,
+            "collision": self.collision_neighborhood,
+            "map": self.map_neighborhood,
+        }
+        self.iterations = 0
+        while self.cost() > lower_bound:
+            if time.perf_counter() - start_time >= time_limit:
+                break
+            if max_iterations is not None and self.iterations >= max_iterations:
+                break
+            self.iterations += 1
+            neighborhood = builders[self.random.choice(self.neighborhoods)]()
+            if neighborhood and self.replan(neighborhood):
+                self.history.append((time.perf_counter() - start_time, self.cost()))
+
+        return generate_plan(to_solution(self.env, self.paths))
+
+
+def lns(
+    inputpath,
+    outputpath,
+    time_limit: float = 5.0,
+    neighborhood_size: int = 4,
+    neighborhoods=NEIGHBORHOODS,
+    seed: int = 0,
+):
+    try:
+        with open(inputpath, "r") as param_file:
+            env = load_environment(param_file)
+            solver = LNS(env, neighborhood_size, neighborhoods, seed)
+            solution = solver.search(time_limit)
+
+            if not solution:
+                print("Solution not found")
+                return
+
+            print(f"Sum of costs after {solver.iterations} neighborhoods:")
+            for elapsed, cost in solver.history:
+                print(f"  {elapsed:8.3f}s  {cost}")
+            write_output(outputpath, solution)
+            return solution
+
+    except Exception as e:
+        print(f"Error processing the input file: {e}")
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("input", help="input file containing map and agents")
+    parser.add_argument("output", help="output file with the schedule")
+    parser.add_argument(
+        "--time-limit", type=float, default=5.0, help="seconds to improve the plan"
+    )
+    parser.add_argument(
+        "--size", type=int, default=4, help="agents replanned per neighborhood"
+    )
+    parser.add_argument(
+        "--neighborhoods",
+        nargs="+",
+        choices=NEIGHBORHOODS,
+        default=list(NEIGHBORHOODS),
+        help="neighborhoods to draw from",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    lns(
+        args.input,
+        args.output,
+        args.time_limit,
+        args.size,
+        args.neighborhoods,
+        args.seed,
+    )
@@ -0,0 +1,87 @@
+"""
+Multi-value decision diagrams (MDDs) and conflict classification for CBS.
+
+The MDD of an agent with path cost c holds, for each timestep t, the cells
+the agent can occupy at t on some path of cost c that respects its
+constraints. A level with a single cell means every such path goes
+through that cell at that time, so forbidding it raises the agent's cost.
+
+A conflict is cardinal when splitting on it raises the cost of both
+children, semi-cardinal when it raises one of them, and non-cardinal
+otherwise. Splitting on cardinal conflicts first raises the lower bound of
+the high level search fastest and keeps its tree small.
+
+Cells are numbered as in Environment.to_cell, and a cost is a path length
+(number of states), as in Environment.compute_solution_cost.
+"""
+
+NON_CARDINAL = 0
+SEMI_CARDINAL = 1
+CARDINAL = 2
+
+
+class MDD:
+    def __init__(self, env, agent_name, constraints, cost):
+        self.goal = env.to_cell(env.agent_dict[agent_name]["goal"].location)
+        self.depth = cost - 1  # Arrival time at the goal
+        self.levels = self.build(env, agent_name, constraints)
+
+    def build(self, env, agent_name, constraints):
+        start = env.to_cell(env.agent_dict[agent_name]["start"].location)
+        distances = env.distance_maps[agent_name]
+        depth = self.depth
+
+        # Forward: cells reachable at each time that can still make the goal
+        levels = [{start}]
+        for time in range(depth):
+            levels.append(
+                {
+                    next_cell
+                    for cell in levels[-1]
+                    for next_cell in env.neighbor_table[cell]
+                    if time + 1 + distances[next_cell] <= depth
+                    and constraints.allows(time, cell, next_cell)
+                }
+            )
+
+        # Backward: keep the cells with a move to the next level
+        levels[depth] &= {self.goal}
+        for time in range(depth - 1, -1, -1):
+            next_level = levels[time + 1]
+            levels[time] = {
+                cell
+                for cell in levels[time]
+                if any(
+                    next_cell in next_level
+                    and constraints.allows(time, cell, next_cell)
+                    for next_cell in env.neighbor_table[cell]
+                )
+            }
+        return levels
+
+    def is_forced(self, time, cell):
+        # Every path of this cost is at `cell` at `time`
+        if time > self.depth:
+            return cell == self.goal  # Parked at the goal
+        return self.levels[time] == {cell}
+
+    def is_forced_move(self, time, cell, next_cell):
+        return self.is_forced(time, cell) and self.is_forced(time + 1, next_cell)
+
+
+def classify_conflict(env, conflict, mdd_1, mdd_2):
+    """
+    Return CARDINAL, SEMI_CARDINAL or NON_CARDINAL for a conflict between
+    conflict.agent_1 and conflict.agent_2, given their MDDs.
+    """
+    if conflict.type == conflict.VERTEX:
+        cell = env.to_cell(conflict.location_1)
+        forced_1 = mdd_1.is_forced(conflict.time, cell)
+        forced_2 = mdd_2.is_forced(conflict.time, cell)
+    else:
+        cell_1 = env.to_cell(conflict.location_1)
+        cell_2 = env.to_cell(conflict.location_2)
+        forced_1 = mdd_1.is_forced_move(conflict.time, cell_1, cell_2)
+        forced_2 = mdd_2.is_forced_move(conflict.time, cell_2, cell_1)
+    # One point per agent whose cost the split raises
+    return int(forced_1) + int(forced_2)
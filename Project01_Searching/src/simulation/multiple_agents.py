@@ -41,82 +41,114 @@ import sys
 
 sys.path.insert(0, "../")
 import argparse
-from math import fabs
-from itertools import combinations
-from copy import deepcopy
+from collections import OrderedDict, deque
+from itertools import combinations, count
+from simulation.mdd import CARDINAL, MDD, classify_conflict
+
+# A move between two cells is packed into one int: from_cell << MOVE_SHIFT | to_cell
+MOVE_SHIFT = 32
+
+# Distance map value of the cells the goal cannot be reached from
+UNREACHABLE = -1
+
+# Low level paths kept by CBS for reuse in other branches
+PATH_CACHE_SIZE = 4096
 
 
 class AStar:
     def __init__(self, env):
+        self.env = env
         self.agent_dict = env.agent_dict
         self.admissible_heuristic = env.admissible_heuristic
         self.is_at_goal = env.is_at_goal
         self.get_neighbors = env.get_neighbors
+        self.count_conflicts = env.count_conflicts
+        self.get_time_limits = env.get_time_limits
 
     def reconstruct_path(self, came_from, current):
         total_path = [current]
-        while current in came_from.keys():
+        while current in came_from:
             current = came_from[current]
             total_path.append(current)
-        return total_path[::-1]
+        return [self.env.to_state(key) for key in reversed(total_path)]
 
     def search(self, agent_name):
         """
-        low level search
+        low level search: space-time A* under the agent's constraints
+
+        A state is packed into one int, time * number of cells + cell, and
+        the constraints are checked with integer lookups (see Constraints).
+        The open list is a binary heap ordered by f, then by the number of
+        conflicts with the other agents' paths, then by larger g (g is the
+        time, as every action costs 1). The heuristic is the agent's distance
+        map, exact when no constraint is in the way. The goal only counts once
+        no vertex constraint can hit the agent parked there, and no state is
+        expanded past the time horizon, so the search ends even when the goal
+        is reserved forever.
         """
-        initial_state = self.agent_dict[agent_name]["start"]
-        step_cost = 1
+        env = self.env
+        cells = env.num_cells
+        neighbor_table = env.neighbor_table
+        vertex_constraints = env.constraints.vertex_constraints
+        edge_constraints = env.constraints.edge_constraints
+        count_conflicts = self.count_conflicts
+        start = env.to_cell(self.agent_dict[agent_name]["start"].location)
+        goal = env.to_cell(self.agent_dict[agent_name]["goal"].location)
+        distances = env.distance_maps[agent_name]
+        goal_time, horizon = self.get_time_limits(agent_name)
+        if distances[start] == UNREACHABLE:
+            return False
 
         closed_set = set()
-        open_set = {initial_state}
-
         came_from = {}
+        conflicts = {start: count_conflicts(0, start)}
 
-        g_score = {}
-        g_score[initial_state] = 0
-
-        f_score = {}
+        # (f, conflicts, -g, state)
+        open_heap = [(distances[start], conflicts[start], 0, start)]
 
-        f_score[initial_state] = self.admissible_heuristic(initial_state, agent_name)
+        while open_heap:
+            _, current_conflicts, _, current = heapq.heappop(open_heap)
+            if current in closed_set:
+                continue
 
-        while open_set:
-            temp_dict = {
-                open_item: f_score.setdefault(open_item, float("inf"))
-                for open_item in open_set
-            }
-            current = min(temp_dict, key=temp_dict.get)
-
-            if self.is_at_goal(current, agent_name):
+            time, cell = divmod(current, cells)
+            if cell == goal and time >= goal_time:
                 return self.reconstruct_path(came_from, current)
 
-            open_set -= {current}
-            closed_set |= {current}
-
-            neighbor_list = self.get_neighbors(current)
+            closed_set.add(current)
+            if time >= horizon:
+                continue
 
-            for neighbor in neighbor_list:
+            next_time = time + 1
+            blocked = vertex_constraints.get(next_time, ())
+            forbidden_moves = edge_constraints.get(time, ())
+            for next_cell in neighbor_table[cell]:
+                if next_cell in blocked:
+                    continue
+                if cell << MOVE_SHIFT | next_cell in forbidden_moves:
+                    continue
+                neighbor = next_time * cells + next_cell
                 if neighbor in closed_set:
                     continue
 
-                tentative_g_score = (
-                    g_score.setdefault(current, float("inf")) + step_cost
+                tentative_conflicts = current_conflicts + count_conflicts(
+                    next_time, next_cell, cell
                 )
-
-                if neighbor not in open_set:
-                    open_set |= {neighbor}
-                elif tentative_g_score >= g_score.setdefault(neighbor, float("inf")):
+                if tentative_conflicts >= conflicts.get(neighbor, float("inf")):
                     continue
 
                 came_from[neighbor] = current
-
-                g_score[neighbor] = tentative_g_score
-                f_score[neighbor] = g_score[neighbor] + self.admissible_heuristic(
-                    neighbor, agent_name
+                conflicts[neighbor] = tentative_conflicts
+                f_score = next_time + distances[next_cell]
+                heapq.heappush(
+                    open_heap, (f_score, tentative_conflicts, -next_time, neighbor)
                 )
         return False
 
 
 class Location(object):
+    __slots__ = ("x", "y")
+
     def __init__(self, x=-1, y=-1):
         self.x = x
         self.y = y
@@ -132,6 +164,8 @@ class Location(object):
 
 
 class State(object):
+    __slots__ = ("time", "location")
+
     def __init__(self, time, location):
         self.time = time
         self.location = location
@@ -140,7 +174,7 @@ class State(object):
         return self.time == other.time and self.location == other.location
 
     def __hash__(self):
-        return hash(str(self.time) + str(self.location.x) + str(self.location.y))
+        return hash((self.time, self.location.x, self.location.y))
 
     def is_equal_except_time(self, other):
         return self.location == other.location
@@ -180,6 +214,8 @@ class Conflict(object):
 
 
 class VertexConstraint(object):
+    __slots__ = ("time", "location")
+
     def __init__(self, time, location):
         self.time = time
         self.location = location
@@ -188,13 +224,15 @@ class VertexConstraint(object):
         return self.time == other.time and self.location == other.location
 
     def __hash__(self):
-        return hash(str(self.time) + str(self.location))
+        return hash((self.time, self.location.x, self.location.y))
 
     def __str__(self):
         return "(" + str(self.time) + ", " + str(self.location) + ")"
 
 
 class EdgeConstraint(object):
+    __slots__ = ("time", "location_1", "location_2")
+
     def __init__(self, time, location_1, location_2):
         self.time = time
         self.location_1 = location_1
@@ -208,7 +246,15 @@ class EdgeConstraint(object):
         )
 
     def __hash__(self):
-        return hash(str(self.time) + str(self.location_1) + str(self.location_2))
+        return hash(
+            (
+                self.time,
+                self.location_1.x,
+                self.location_1.y,
+                self.location_2.x,
+                self.location_2.y,
+            )
+        )
 
     def __str__(self):
         return (
@@ -223,103 +269,250 @@ class EdgeConstraint(object):
 
 
 class Constraints(object):
+    """
+    Constraints of one agent, packed so the low level search checks them with
+    integer lookups. Cells are numbered x * columns + y (Environment.to_cell).
+
+    vertex_constraints: time -> frozenset of the cells the agent may not occupy
+    edge_constraints: time -> frozenset of the moves (from_cell << MOVE_SHIFT
+    | to_cell) the agent may not make between time and time + 1
+
+    Frozensets are replaced, never changed in place, so copies can share
+    them.
+    """
+
     def __init__(self):
-        self.vertex_constraints = set()
-        self.edge_constraints = set()
+        self.vertex_constraints = {}
+        self.edge_constraints = {}
+        self.latest_time = 0  # No constraint applies after this time
+
+    def add_vertex_constraint(self, time, cell):
+        cells = self.vertex_constraints.get(time, frozenset())
+        self.vertex_constraints[time] = cells | {cell}
+        self.latest_time = max(self.latest_time, time)
+
+    def add_edge_constraint(self, time, cell_1, cell_2):
+        moves = self.edge_constraints.get(time, frozenset())
+        self.edge_constraints[time] = moves | {cell_1 << MOVE_SHIFT | cell_2}
+        self.latest_time = max(self.latest_time, time + 1)
 
     def add_constraint(self, other):
-        self.vertex_constraints |= other.vertex_constraints
-        self.edge_constraints |= other.edge_constraints
+        for time, cells in other.vertex_constraints.items():
+            self.vertex_constraints[time] = (
+                self.vertex_constraints.get(time, frozenset()) | cells
+            )
+        for time, moves in other.edge_constraints.items():
+            self.edge_constraints[time] = (
+                self.edge_constraints.get(time, frozenset()) | moves
+            )
+        self.latest_time = max(self.latest_time, other.latest_time)
 
-    def __str__(self):
+    def allows(self, time, cell, next_cell):
+        # May the agent go from cell at time to next_cell at time + 1?
+        if next_cell in self.vertex_constraints.get(time + 1, ()):
+            return False
+        return cell << MOVE_SHIFT | next_cell not in self.edge_constraints.get(time, ())
+
+    def key(self):
+        """
+        Canonical, hashable form of the constraints: equal for equal sets of
+        constraints, whatever order they were added in.
+        """
         return (
-            "VC: "
-            + str([str(vc) for vc in self.vertex_constraints])
-            + "EC: "
-            + str([str(ec) for ec in self.edge_constraints])
+            tuple(
+                (time, tuple(sorted(cells)))
+                for time, cells in sorted(self.vertex_constraints.items())
+            ),
+            tuple(
+                (time, tuple(sorted(moves)))
+                for time, moves in sorted(self.edge_constraints.items())
+            ),
         )
 
+    def copy(self):
+        # Cheap copy: only the per-time dicts are duplicated
+        constraints = Constraints()
+        constraints.vertex_constraints = dict(self.vertex_constraints)
+        constraints.edge_constraints = dict(self.edge_constraints)
+        constraints.latest_time = self.latest_time
+        return constraints
+
+    def __str__(self):
+        vertex_constraints = [
+            (time, cell)
+            for time, cells in sorted(self.vertex_constraints.items())
+            for cell in sorted(cells)
+        ]
+        edge_constraints = [
+            (time, move >> MOVE_SHIFT, move & ((1 << MOVE_SHIFT) - 1))
+            for time, moves in sorted(self.edge_constraints.items())
+            for move in sorted(moves)
+        ]
+        return "VC: " + str(vertex_constraints) + "EC: " + str(edge_constraints)
+
 
 class Environment(object):
-    def __init__(self, dimension, agents, obstacles):
+    def __init__(self, dimension, agents, obstacles, planner=AStar):
         self.dimension = dimension
         self.obstacles = obstacles
+        self.obstacle_set = set(obstacles)
+
+        # Cells are numbered x * cols + y, neighbor_table[cell] holds the
+        # cells reachable in one action (waiting included)
+        self.cols = dimension[1]
+        self.num_cells = dimension[0] * dimension[1]
+        self.neighbor_table = self.make_neighbor_table()
 
         self.agents = agents
         self.agent_dict = {}
 
         self.make_agent_dict()
 
+        # agent -> distance from each cell to the agent's goal on the static
+        # map, the exact heuristic of the low level searches
+        self.distance_maps = {
+            agent: self.make_distance_map(self.to_cell(goals["goal"].location))
+            for agent, goals in self.agent_dict.items()
+        }
+
         self.constraints = Constraints()
         self.constraint_dict = {}
 
-        self.a_star = AStar(self)
+        # Conflict avoidance table: where the other agents' paths are, used to
+        # break ties between equally short paths
+        self.reserved_vertices = {}  # packed state -> number of agents
+        self.reserved_edges = {}  # packed state << MOVE_SHIFT | cell -> agents
+        self.parked_agents = {}  # cell -> times at which agents stop there
+
+        # Low level search: any class built from the environment whose
+        # search(agent_name) returns one State per timestep (AStar, SIPP)
+        self.low_level = planner(self)
+
+    def make_neighbor_table(self):
+        neighbor_table = []
+        for cell in range(self.num_cells):
+            x, y = divmod(cell, self.cols)
+            if (x, y) in self.obstacle_set:
+                neighbor_table.append(())
+                continue
+            neighbors = [cell]  # Wait action
+            for dx, dy in DIRECTIONS:
+                location = Location(x + dx, y + dy)
+                position = (location.x, location.y)
+                if self.in_bounds(location) and position not in self.obstacle_set:
+                    neighbors.append(self.to_cell(location))
+            neighbor_table.append(tuple(neighbors))
+        return neighbor_table
+
+    def make_distance_map(self, goal):
+        # Breadth-first search from the goal; moves are reversible on the grid
+        distances = [UNREACHABLE] * self.num_cells
+        distances[goal] = 0
+        queue = deque([goal])
+        while queue:
+            cell = queue.popleft()
+            distance = distances[cell] + 1
+            for neighbor in self.neighbor_table[cell]:
+                if distances[neighbor] == UNREACHABLE:
+                    distances[neighbor] = distance
+                    queue.append(neighbor)
+        return distances
+
+    def in_bounds(self, location):
+        return (
+            0 <= location.x < self.dimension[0] and 0 <= location.y < self.dimension[1]
+        )
+
+    def to_cell(self, location):
+        return location.x * self.cols + location.y
+
+    def to_state(self, key):
+        # Unpack a low level search state, time * num_cells + cell
+        time, cell = divmod(key, self.num_cells)
+        return State(time, Location(*divmod(cell, self.cols)))
 
     def get_neighbors(self, state):
         neighbors = []
-
-        # Wait action
-        n = State(state.time + 1, state.location)
-        if self.state_valid(n):
-            neighbors.append(n)
-        # Up action
-        n = State(state.time + 1, Location(state.location.x, state.location.y + 1))
-        if self.state_valid(n) and self.transition_valid(state, n):
-            neighbors.append(n)
-        # Down action
-        n = State(state.time + 1, Location(state.location.x, state.location.y - 1))
-        if self.state_valid(n) and self.transition_valid(state, n):
-            neighbors.append(n)
-        # Left action
-        n = State(state.time + 1, Location(state.location.x - 1, state.location.y))
-        if self.state_valid(n) and self.transition_valid(state, n):
-            neighbors.append(n)
-        # Right action
-        n = State(state.time + 1, Location(state.location.x + 1, state.location.y))
-        if self.state_valid(n) and self.transition_valid(state, n):
-            neighbors.append(n)
+        next_time = (state.time + 1) * self.num_cells
+        for next_cell in self.neighbor_table[self.to_cell(state.location)]:
+            n = self.to_state(next_time + next_cell)
+            if self.state_valid(n) and self.transition_valid(state, n):
+                neighbors.append(n)
         return neighbors
 
     def get_first_conflict(self, solution):
-        max_t = max([len(plan) for plan in solution.values()])
-        result = Conflict()
+        return next(self.iter_conflicts(solution), False)
+
+    def get_all_conflicts(self, solution):
+        return list(self.iter_conflicts(solution))
+
+    def iter_conflicts(self, solution):
+        """
+        Yield the conflicts of `solution` ordered by time; at each time vertex
+        conflicts come before edge conflicts, each sorted by agent pair (in
+        the order of `solution`). Agents stay at their goal after their path
+        ends.
+
+        Positions are bucketed per timestep, vertex conflicts are agents
+        sharing a bucket and edge conflicts are moves whose reverse move is
+        made by another agent, so each timestep costs O(agents).
+        """
+        agents = list(solution.keys())
+        paths = [
+            [self.to_cell(state.location) for state in solution[agent]]
+            for agent in agents
+        ]
+        max_t = max(len(path) for path in paths)
         for t in range(max_t):
-            for agent_1, agent_2 in combinations(solution.keys(), 2):
-                state_1 = self.get_state(agent_1, solution, t)
-                state_2 = self.get_state(agent_2, solution, t)
-                if state_1.is_equal_except_time(state_2):
-                    result.time = t
-                    result.type = Conflict.VERTEX
-                    result.location_1 = state_1.location
-                    result.agent_1 = agent_1
-                    result.agent_2 = agent_2
-                    return result
-
-            for agent_1, agent_2 in combinations(solution.keys(), 2):
-                state_1a = self.get_state(agent_1, solution, t)
-                state_1b = self.get_state(agent_1, solution, t + 1)
-
-                state_2a = self.get_state(agent_2, solution, t)
-                state_2b = self.get_state(agent_2, solution, t + 1)
-
-                if state_1a.is_equal_except_time(
-                    state_2b
-                ) and state_1b.is_equal_except_time(state_2a):
-                    result.time = t
-                    result.type = Conflict.EDGE
-                    result.agent_1 = agent_1
-                    result.agent_2 = agent_2
-                    result.location_1 = state_1a.location
-                    result.location_2 = state_1b.location
-                    return result
-        return False
+            cells = [path[min(t, len(path) - 1)] for path in paths]
+            next_cells = [path[min(t + 1, len(path) - 1)] for path in paths]
+
+            occupants = {}
+            for i, cell in enumerate(cells):
+                occupants.setdefault(cell, []).append(i)
+            vertex_conflicts = sorted(
+                (i, j)
+                for sharing in occupants.values()
+                if len(sharing) > 1
+                for i, j in combinations(sharing, 2)
+            )
+            for i, j in vertex_conflicts:
+                conflict = Conflict()
+                conflict.time = t
+                conflict.type = Conflict.VERTEX
+                conflict.location_1 = self.get_state(agents[i], solution, t).location
+                conflict.agent_1 = agents[i]
+                conflict.agent_2 = agents[j]
+                yield conflict
+
+            moves = {}
+            for i, move in enumerate(zip(cells, next_cells)):
+                if move[0] != move[1]:
+                    moves.setdefault(move, []).append(i)
+            for i, (cell, next_cell) in enumerate(zip(cells, next_cells)):
+                for j in moves.get((next_cell, cell), ()):
+                    if j < i:
+                        continue
+                    conflict = Conflict()
+                    conflict.time = t
+                    conflict.type = Conflict.EDGE
+                    conflict.agent_1 = agents[i]
+                    conflict.agent_2 = agents[j]
+                    conflict.location_1 = self.get_state(
+                        agents[i], solution, t
+                    ).location
+                    conflict.location_2 = self.get_state(
+                        agents[i], solution, t + 1
+                    ).location
+                    yield conflict
 
     def create_constraints_from_conflict(self, conflict):
         constraint_dict = {}
         if conflict.type == Conflict.VERTEX:
-            v_constraint = VertexConstraint(conflict.time, conflict.location_1)
             constraint = Constraints()
-            constraint.vertex_constraints |= {v_constraint}
+            constraint.add_vertex_constraint(
+                conflict.time, self.to_cell(conflict.location_1)
+            )
             constraint_dict[conflict.agent_1] = constraint
             constraint_dict[conflict.agent_2] = constraint
 
@@ -327,15 +520,10 @@ class Environment(object):
             constraint1 = Constraints()
             constraint2 = Constraints()
 
-            e_constraint1 = EdgeConstraint(
-                conflict.time, conflict.location_1, conflict.location_2
-            )
-            e_constraint2 = EdgeConstraint(
-                conflict.time, conflict.location_2, conflict.location_1
-            )
-
-            constraint1.edge_constraints |= {e_constraint1}
-            constraint2.edge_constraints |= {e_constraint2}
+            cell_1 = self.to_cell(conflict.location_1)
+            cell_2 = self.to_cell(conflict.location_2)
+            constraint1.add_edge_constraint(conflict.time, cell_1, cell_2)
+            constraint2.add_edge_constraint(conflict.time, cell_2, cell_1)
 
             constraint_dict[conflict.agent_1] = constraint1
             constraint_dict[conflict.agent_2] = constraint2
@@ -349,30 +537,87 @@ class Environment(object):
             return solution[agent_name][-1]
 
     def state_valid(self, state):
+        if not self.in_bounds(state.location):
+            return False
+        blocked = self.constraints.vertex_constraints.get(state.time, ())
         return (
-            state.location.x >= 0
-            and state.location.x < self.dimension[0]
-            and state.location.y >= 0
-            and state.location.y < self.dimension[1]
-            and VertexConstraint(state.time, state.location)
-            not in self.constraints.vertex_constraints
-            and (state.location.x, state.location.y) not in self.obstacles
+            self.to_cell(state.location) not in blocked
+            and (state.location.x, state.location.y) not in self.obstacle_set
         )
 
     def transition_valid(self, state_1, state_2):
-        return (
-            EdgeConstraint(state_1.time, state_1.location, state_2.location)
-            not in self.constraints.edge_constraints
+        move = self.to_cell(state_1.location) << MOVE_SHIFT | self.to_cell(
+            state_2.location
         )
+        return move not in self.constraints.edge_constraints.get(state_1.time, ())
 
     def is_solution(self, agent_name):
         pass
 
-    def admissible_heuristic(self, state, agent_name):
-        goal = self.agent_dict[agent_name]["goal"]
-        return fabs(state.location.x - goal.location.x) + fabs(
-            state.location.y - goal.location.y
+    def get_time_limits(self, agent_name):
+        """
+        Return (goal_time, horizon) for the agent's current constraints.
+
+        The agent may stop at its goal only from goal_time on, after the last
+        vertex constraint on the goal. After its latest constraint, an agent
+        needs at most one step per cell to reach the goal, so no search has to
+        look past horizon.
+        """
+        goal = self.to_cell(self.agent_dict[agent_name]["goal"].location)
+        goal_time = max(
+            (
+                time + 1
+                for time, cells in self.constraints.vertex_constraints.items()
+                if goal in cells
+            ),
+            default=0,
         )
+        horizon = self.constraints.latest_time + self.num_cells
+        return goal_time, horizon
+
+    def set_conflict_avoidance(self, solution, agent_name=None):
+        """
+        Record the paths in `solution`, except the one of `agent_name`, as the
+        paths the low level search should avoid crossing.
+        """
+        self.reserved_vertices = {}
+        self.reserved_edges = {}
+        self.parked_agents = {}
+        for agent, path in solution.items():
+            if agent != agent_name:
+                self.add_conflict_avoidance(path)
+
+    def add_conflict_avoidance(self, path):
+        for state_1, state_2 in zip(path, path[1:]):
+            cell_1 = self.to_cell(state_1.location)
+            cell_2 = self.to_cell(state_2.location)
+            vertex = state_1.time * self.num_cells + cell_1
+            self.reserved_vertices[vertex] = self.reserved_vertices.get(vertex, 0) + 1
+            if cell_1 != cell_2:
+                edge = vertex << MOVE_SHIFT | cell_2
+                self.reserved_edges[edge] = self.reserved_edges.get(edge, 0) + 1
+        goal = path[-1]
+        self.parked_agents.setdefault(self.to_cell(goal.location), []).append(goal.time)
+
+    def count_conflicts(self, time, cell, previous_cell=None):
+        """
+        Number of other agents colliding with an agent that is at `cell` at
+        `time`, coming from `previous_cell` (None for the start state).
+        """
+        conflicts = self.reserved_vertices.get(time * self.num_cells + cell, 0)
+        for parked_time in self.parked_agents.get(cell, ()):
+            if time >= parked_time:
+                conflicts += 1
+        if previous_cell is not None and previous_cell != cell:
+            # Another agent making the opposite move at the same time
+            opposite = (
+                (time - 1) * self.num_cells + cell
+            ) << MOVE_SHIFT | previous_cell
+            conflicts += self.reserved_edges.get(opposite, 0)
+        return conflicts
+
+    def admissible_heuristic(self, state, agent_name):
+        return self.distance_maps[agent_name][self.to_cell(state.location)]
 
     def is_at_goal(self, state, agent_name):
         goal_state = self.agent_dict[agent_name]["goal"]
@@ -389,14 +634,25 @@ class Environment(object):
 
     def compute_solution(self):
         solution = {}
+        self.set_conflict_avoidance(solution)
         for agent in self.agent_dict.keys():
             self.constraints = self.constraint_dict.setdefault(agent, Constraints())
-            local_solution = self.a_star.search(agent)
+            local_solution = self.low_level.search(agent)
             if not local_solution:
                 return False
             solution.update({agent: local_solution})
+            self.add_conflict_avoidance(local_solution)
         return solution
 
+    def compute_path(self, agent_name, solution):
+        """
+        Replan `agent_name` alone under its constraints in constraint_dict,
+        avoiding where possible the other agents' paths in `solution`.
+        """
+        self.constraints = self.constraint_dict.setdefault(agent_name, Constraints())
+        self.set_conflict_avoidance(solution, agent_name)
+        return self.low_level.search(agent_name)
+
     def compute_solution_cost(self, solution):
         return sum([len(path) for path in solution.values()])
 
@@ -407,76 +663,231 @@ class HighLevelNode(object):
         self.constraint_dict = {}
         self.cost = 0
 
+    def constraint_key(self):
+        # Nodes with the same constraints have the same subtree
+        return tuple(
+            (agent, constraints.key())
+            for agent, constraints in sorted(self.constraint_dict.items())
+            if constraints.vertex_constraints or constraints.edge_constraints
+        )
+
     def __eq__(self, other):
         if not isinstance(other, type(self)):
             return NotImplemented
-        return self.solution == other.solution and self.cost == other.cost
+        return self.constraint_key() == other.constraint_key()
 
     def __hash__(self):
-        return hash((self.cost))
+        return hash(self.constraint_key())
 
     def __lt__(self, other):
         return self.cost < other.cost
 
 
 class CBS(object):
-    def __init__(self, environment):
+    def __init__(
+        self,
+        environment,
+        cache_size: int = PATH_CACHE_SIZE,
+        prioritize_conflicts: bool = True,
+    ):
         self.env = environment
-        self.open_set = set()
+        # Split on cardinal conflicts first (MDDs) and bypass when possible,
+        # otherwise split on the first conflict found
+        self.prioritize_conflicts = prioritize_conflicts
+        # Heap of (cost, -order, node): among equal costs the newest node, which
+        # is the deepest, goes first
+        self.open_set = []
+        # Constraint keys of every node generated so far
         self.closed_set = set()
+        self.node_order = count()
+
+        # LRU cache of low level paths: (agent, constraint key) -> path. The
+        # path only depends on the other agents through tie-breaking, so a
+        # cached one is as short as a fresh one
+        self.path_cache = OrderedDict()
+        self.mdd_cache = OrderedDict()  # (agent, constraint key, cost) -> MDD
+        self.cache_size = cache_size
+        self.stats = {
+            "expanded": 0,
+            "generated": 0,
+            "bypasses": 0,
+            "cache_hits": 0,
+            "cache_misses": 0,
+        }
+
+    def push_node(self, node):
+        key = node.constraint_key()
+        if key in self.closed_set:
+            return
+        self.closed_set.add(key)
+        self.stats["generated"] += 1
+        heapq.heappush(self.open_set, (node.cost, -next(self.node_order), node))
 
     def generate_plan(self, solution):
-        plan = {}
-        for agent, path in solution.items():
-            start = path[0]
-            goal = path[-1]
-            path_list = [f"({state.location.x}, {state.location.y})" for state in path]
-            path_str = " -> ".join(path_list)
-            plan_description = f"({start.location.x}, {start.location.y}) -> ({goal.location.x}, {goal.location.y}): {path_str}\nPath length: {len(path)}"
-            plan[agent] = plan_description
-        return plan
+        return generate_plan(solution)
+
+    def compute_path(self, agent_name, solution):
+        # Environment.compute_path, reusing the path planned for the same
+        # agent under the same constraints in another branch
+        key = (agent_name, self.env.constraint_dict[agent_name].key())
+        if key in self.path_cache:
+            self.stats["cache_hits"] += 1
+            self.path_cache.move_to_end(key)
+            return self.path_cache[key]
+
+        self.stats["cache_misses"] += 1
+        path = self.env.compute_path(agent_name, solution)
+        self.path_cache[key] = path
+        if len(self.path_cache) > self.cache_size:
+            self.path_cache.popitem(last=False)
+        return path
+
+    def get_mdd(self, agent_name, node):
+        constraints = node.constraint_dict[agent_name]
+        cost = len(node.solution[agent_name])
+        key = (agent_name, constraints.key(), cost)
+        if key in self.mdd_cache:
+            self.mdd_cache.move_to_end(key)
+            return self.mdd_cache[key]
+
+        mdd = MDD(self.env, agent_name, constraints, cost)
+        self.mdd_cache[key] = mdd
+        if len(self.mdd_cache) > self.cache_size:
+            self.mdd_cache.popitem(last=False)
+        return mdd
+
+    def choose_conflict(self, node):
+        """
+        Return (conflict, its classification, number of conflicts) for the
+        conflict to split `node` on, or (False, None, 0) when there is none:
+        the first cardinal conflict, else the first semi-cardinal one, else
+        the first one.
+        """
+        if not self.prioritize_conflicts:
+            conflict = self.env.get_first_conflict(node.solution)
+            return conflict, None, int(bool(conflict))
+
+        conflicts = self.env.get_all_conflicts(node.solution)
+        best, best_kind = False, None
+        for conflict in conflicts:
+            kind = classify_conflict(
+                self.env,
+                conflict,
+                self.get_mdd(conflict.agent_1, node),
+                self.get_mdd(conflict.agent_2, node),
+            )
+            if kind == CARDINAL:
+                return conflict, kind, len(conflicts)
+            if best_kind is None or kind > best_kind:
+                best, best_kind = conflict, kind
+        return best, best_kind, len(conflicts)
 
-    def search(self):
+    def make_root(self):
         start = HighLevelNode()
-        # TODO: Initialize it in a better way
-        start.constraint_dict = {}
-        for agent in self.env.agent_dict.keys():
-            start.constraint_dict[agent] = Constraints()
+        start.constraint_dict = {agent: Constraints() for agent in self.env.agent_dict}
+        self.env.constraint_dict = start.constraint_dict
         start.solution = self.env.compute_solution()
         if not start.solution:
-            return {}
+            return None
         start.cost = self.env.compute_solution_cost(start.solution)
+        return start
+
+    def make_child(self, P, agent, constraint):
+        # The child shares everything with P except the constraints and the
+        # path of the agent that gets the new constraint
+        new_node = HighLevelNode()
+        new_node.constraint_dict = dict(P.constraint_dict)
+        new_node.constraint_dict[agent] = P.constraint_dict[agent].copy()
+        new_node.constraint_dict[agent].add_constraint(constraint)
+        return new_node
+
+    def set_child_path(self, P, new_node, agent, path):
+        # Return the child with its new path, None if the agent has none
+        if not path:
+            return None
+        new_node.solution = dict(P.solution)
+        new_node.solution[agent] = path
+        new_node.cost = P.cost - len(P.solution[agent]) + len(path)
+        return new_node
+
+    def generate_child(self, P, agent, constraint):
+        new_node = self.make_child(P, agent, constraint)
+        self.env.constraint_dict = new_node.constraint_dict
+        path = self.compute_path(agent, P.solution)
+        return self.set_child_path(P, new_node, agent, path)
+
+    def find_bypass(self, P, children, num_conflicts):
+        """
+        Bypass rule: a child with the same cost as P and fewer conflicts has
+        a path P may use as well (it only meets more constraints), so P can
+        take it instead of branching. Return that child or None.
+        """
+        for child in children:
+            if child.cost == P.cost:
+                if len(self.env.get_all_conflicts(child.solution)) < num_conflicts:
+                    return child
+        return None
 
-        self.open_set |= {start}
+    def search(self):
+        start = self.make_root()
+        if start is None:
+            return {}
+        self.push_node(start)
 
         while self.open_set:
-            P = min(self.open_set)
-            self.open_set -= {P}
-            self.closed_set |= {P}
+            P = heapq.heappop(self.open_set)[-1]
+            self.stats["expanded"] += 1
+
+            while True:
+                self.env.constraint_dict = P.constraint_dict
+                conflict, kind, num_conflicts = self.choose_conflict(P)
+                if not conflict:
+                    return self.generate_plan(P.solution)
+
+                constraint_dict = self.env.create_constraints_from_conflict(conflict)
+                children = [
+                    self.generate_child(P, agent, constraint)
+                    for agent, constraint in constraint_dict.items()
+                ]
+                children = [child for child in children if child is not None]
+
+                # A cardinal split raises both costs, nothing to bypass
+                bypass = None
+                if kind is not None and kind != CARDINAL:
+                    bypass = self.find_bypass(P, children, num_conflicts)
+                if bypass is None:
+                    break
+                self.stats["bypasses"] += 1
+                P.solution = bypass.solution
+
+            for child in children:
+                self.push_node(child)
 
-            self.env.constraint_dict = P.constraint_dict
-            conflict_dict = self.env.get_first_conflict(P.solution)
-            if not conflict_dict:
-                # print("solution found")
-                return self.generate_plan(P.solution)
+        return {}
 
-            constraint_dict = self.env.create_constraints_from_conflict(conflict_dict)
 
-            for agent in constraint_dict.keys():
-                new_node = deepcopy(P)
-                new_node.constraint_dict[agent].add_constraint(constraint_dict[agent])
+def generate_plan(solution):
+    plan = {}
+    for agent, path in solution.items():
+        start = path[0]
+        goal = path[-1]
+        path_list = [f"({state.location.x}, {state.location.y})" for state in path]
+        path_str = " -> ".join(path_list)
+        plan_description = f"({start.location.x}, {start.location.y}) -> ({goal.location.x}, {goal.location.y}): {path_str}\nPath length: {len(path)}"
+        plan[agent] = plan_description
+    return plan
 
-                self.env.constraint_dict = new_node.constraint_dict
-                new_node.solution = self.env.compute_solution()
-                if not new_node.solution:
-                    continue
-                new_node.cost = self.env.compute_solution_cost(new_node.solution)
 
-                # TODO: ending condition
-                if new_node not in self.closed_set:
-                    self.open_set |= {new_node}
+def load_environment(param_file, planner=AStar):
+    header = param_file.readline().strip().split()
+    if len(header) != 4:
+        raise ValueError("Header must contain exactly four integer values.")
+    width, height, committed_time, fuel_capacity = map(int, header)
+    agent_data, obstacles, fuels = parse_input_file(param_file, height)
+    agents = validate_agents(agent_data)
 
-        return {}
+    # Assume the Environment constructor can now take fuels as an argument
+    return Environment((width, height), agents, obstacles, planner)
 
 
 def parse_input_file(param_file, height):
@@ -548,18 +959,10 @@ def parse_arguments():
     return parser.parse_args()
 
 
-def cbs(inputpath, outputpath):
+def cbs(inputpath, outputpath, planner=AStar):
     try:
         with open(inputpath, "r") as param_file:
-            header = param_file.readline().strip().split()
-            if len(header) != 4:
-                raise ValueError("Header must contain exactly four integer values.")
-            width, height, committed_time, fuel_capacity = map(int, header)
-            agent_data, obstacles, fuels = parse_input_file(param_file, height)
-            agents = validate_agents(agent_data)
-
-            # Assume the Environment constructor can now take fuels as an argument
-            env = Environment((width, height), agents, obstacles)
+            env = load_environment(param_file, planner)
             cbs = CBS(env)
             solution = cbs.search()
 
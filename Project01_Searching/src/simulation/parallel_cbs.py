@@ -0,0 +1,188 @@
+"""
+CBS with the low level replans of each expansion run on a process pool.
+
+Each worker builds its own copy of the environment (obstacle map, neighbor
+table and distance maps) once, when the pool starts, and then only receives
+the agent, its constraints and the current paths of the other agents.
+
+The master pops up to `batch_size` best nodes from the open list, picks the
+conflict of each (MDDs stay in the master), and sends all their child
+replans to the pool at once. Results come back in submission order and are
+merged node by node, in the order the nodes were popped, so the plan only
+depends on batch_size, never on the number of workers. With batch_size = 1
+the search is the same as CBS.
+
+Usage (at `src` directory):
+    python -m simulation.parallel_cbs ../data/input/input5_level4.txt output.txt --workers 4
+"""
+
+import argparse
+import heapq
+from concurrent.futures import ProcessPoolExecutor
+
+from simulation.mdd import CARDINAL
+from simulation.multiple_agents import CBS, Environment, load_environment, write_output
+
+# Environment built in each worker process by `init_worker`
+_env = None
+
+
+def init_worker(dimension, agents, obstacles, planner):
+    global _env
+    _env = Environment(dimension, agents, obstacles, planner)
+
+
+def replan(agent_name, constraints, solution):
+    _env.constraint_dict = {agent_name: constraints}
+    return _env.compute_path(agent_name, solution)
+
+
+class ParallelCBS(CBS):
+    def __init__(self, environment, workers: int = None, batch_size: int = 1, **kwargs):
+        if batch_size < 1:
+            raise ValueError("The batch size must be at least 1.")
+        super().__init__(environment, **kwargs)
+        self.workers = workers
+        self.batch_size = batch_size
+
+    def compute_children(self, pool, splits):
+        """
+        Replan the children of several nodes on the pool.
+
+        splits holds (P, [(agent, child), ...]) pairs. The path cache is
+        checked and filled in the same order as CBS would, a repeated
+        (agent, constraints) pair is only planned once, and the children
+        are returned per node with the ones without a path left out.
+        """
+        jobs = []
+        pending = {}  # cache key -> index in jobs
+        lookups = []  # Per child: (index in jobs, None) or (None, cached path)
+        for P, children in splits:
+            for agent, child in children:
+                key = (agent, child.constraint_dict[agent].key())
+                if key in self.path_cache:
+                    self.stats["cache_hits"] += 1
+                    self.path_cache.move_to_end(key)
+                    lookups.append((None, self.path_cache[key]))
+                elif key in pending:
+                    self.stats["cache_hits"] += 1
+                    lookups.append((pending[key], None))
+                else:
+                    self.stats["cache_misses"] += 1
+                    pending[key] = len(jobs)
+                    lookups.append((pending[key], None))
+                    jobs.append((agent, child.constraint_dict[agent], P.solution))
+
+        paths = list(pool.map(replan, *zip(*jobs))) if jobs else []
+        for key, index in pending.items():
+            self.path_cache[key] = paths[index]
+            if len(self.path_cache) > self.cache_size:
+                self.path_cache.popitem(last=False)
+
+        results = iter(lookups)
+        generated = []
+        for P, children in splits:
+            nodes = []
+            for agent, child in children:
+                index, path = next(results)
+                if index is not None:
+                    path = paths[index]
+                node = self.set_child_path(P, child, agent, path)
+                if node is not None:
+                    nodes.append(node)
+            generated.append(nodes)
+        return generated
+
+    def search(self):
+        start = self.make_root()
+        if start is None:
+            return {}
+        self.push_node(start)
+
+        env = self.env
+        initargs = (env.dimension, env.agents, env.obstacles, type(env.low_level))
+        with ProcessPoolExecutor(
+            max_workers=self.workers, initializer=init_worker, initargs=initargs
+        ) as pool:
+            while self.open_set:
+                batch = []
+                while self.open_set and len(batch) < self.batch_size:
+                    batch.append(heapq.heappop(self.open_set)[-1])
+
+                splits = []
+                bypass_info = []
+                for P in batch:
+                    self.stats["expanded"] += 1
+                    env.constraint_dict = P.constraint_dict
+                    conflict, kind, num_conflicts = self.choose_conflict(P)
+                    if not conflict:
+                        if P.cost == batch[0].cost:
+                            # No node left in the open list costs less
+                            return self.generate_plan(P.solution)
+                        self.requeue(P)
+                        continue
+                    constraint_dict = env.create_constraints_from_conflict(conflict)
+                    children = [
+                        (agent, self.make_child(P, agent, constraint))
+                        for agent, constraint in constraint_dict.items()
+                    ]
+                    splits.append((P, children))
+                    bypass_info.append((kind, num_conflicts))
+
+                generated = self.compute_children(pool, splits)
+                for (P, _), children, (kind, num_conflicts) in zip(
+                    splits, generated, bypass_info
+                ):
+                    bypass = None
+                    if kind is not None and kind != CARDINAL:
+                        bypass = self.find_bypass(P, children, num_conflicts)
+                    if bypass is not None:
+                        # Expand P again with the better path, as CBS does
+                        self.stats["bypasses"] += 1
+                        P.solution = bypass.solution
+                        self.requeue(P)
+                        continue
+                    for child in children:
+                        self.push_node(child)
+
+        return {}
+
+    def requeue(self, node):
+        # Put an expanded node back in the open list, ahead of its equals
+        heapq.heappush(self.open_set, (node.cost, -next(self.node_order), node))
+
+
+def parallel_cbs(inputpath, outputpath, workers: int = None, batch_size: int = 1):
+    try:
+        with open(inputpath, "r") as param_file:
+            env = load_environment(param_file)
+            solver = ParallelCBS(env, workers, batch_size)
+            solution = solver.search()
+
+            if not solution:
+                print("Solution not found")
+                return
+
+            write_output(outputpath, solution)
+            return solution
+
+    except Exception as e:
+        print(f"Error processing the input file: {e}")
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("input", help="input file containing map and agents")
+    parser.add_argument("output", help="output file with the schedule")
+    parser.add_argument(
+        "--workers", type=int, default=None, help="worker processes (default: CPUs)"
+    )
+    parser.add_argument(
+        "--batch", type=int, default=1, help="open nodes expanded together"
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    parallel_cbs(args.input, args.output, args.workers, args.batch)
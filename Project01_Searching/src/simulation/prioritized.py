@@ -0,0 +1,203 @@
+"""
+Prioritized planning: a fast, incomplete alternative to CBS.
+
+Agents are planned one at a time, in priority order, with space-time A*
+against a reservation table holding the paths of the agents planned before
+them: vertex reservations (a cell at a time), edge reservations (a move at a
+time, so nobody swaps with it) and parked agents (an agent that reached its
+goal keeps the cell forever). Plans are collision-free but not optimal, and
+an agent can be boxed in by the ones before it; the planner then restarts
+with a random priority order.
+
+Usage (at `src` directory):
+    python -m simulation.prioritized ../data/input/input5_level4.txt output.txt
+"""
+
+import argparse
+import heapq
+import random
+
+from simulation.multiple_agents import (
+    MOVE_SHIFT,
+    UNREACHABLE,
+    Environment,
+    generate_plan,
+    load_environment,
+    write_output,
+)
+
+
+class ReservationTable:
+    def __init__(self, num_cells: int):
+        self.num_cells = num_cells
+        self.vertices = set()  # Packed states: time * num_cells + cell
+        self.edges = set()  # Packed moves: state << MOVE_SHIFT | next cell
+        self.parked = {}  # cell -> time from which an agent stays there
+        self.last_visit = {}  # cell -> last time the cell is reserved
+        self.latest_time = 0
+
+    def reserve(self, cells):
+        # Reserve a path given as one cell per timestep
+        for time, (cell, next_cell) in enumerate(zip(cells, cells[1:])):
+            state = time * self.num_cells + cell
+            self.vertices.add(state)
+            self.edges.add(state << MOVE_SHIFT | next_cell)
+            self.last_visit[cell] = max(self.last_visit.get(cell, 0), time)
+        arrival = len(cells) - 1
+        self.parked[cells[-1]] = arrival
+        self.latest_time = max(self.latest_time, arrival)
+
+    def is_free(self, time, cell):
+        parked = self.parked.get(cell)
+        if parked is not None and time >= parked:
+            return False
+        return time * self.num_cells + cell not in self.vertices
+
+    def is_move_free(self, time, cell, next_cell):
+        # Nobody makes the opposite move between time and time + 1
+        state = time * self.num_cells + next_cell
+        return state << MOVE_SHIFT | cell not in self.edges
+
+
+def plan_with_reservations(env: Environment, agent_name: str, table):
+    """
+    Space-time A* for one agent that avoids every reservation in `table`.
+    Return the path as a list of cells, one per timestep, or None.
+    """
+    cells = env.num_cells
+    neighbor_table = env.neighbor_table
+    start = env.to_cell(env.agent_dict[agent_name]["start"].location)
+    goal = env.to_cell(env.agent_dict[agent_name]["goal"].location)
+    distances = env.distance_maps[agent_name]
+    # Parking on the goal is only safe once nobody passes there any more
+    goal_time = table.last_visit.get(goal, -1) + 1
+    horizon = table.latest_time + cells
+
+    if distances[start] == UNREACHABLE or not table.is_free(0, start):
+        return None
+
+    came_from = {}
+    closed_set = set()
+    open_heap = [(distances[start], 0, start)]  # (f, -g, state)
+
+    while open_heap:
+        _, _, current = heapq.heappop(open_heap)
+        if current in closed_set:
+            continue
+
+        time, cell = divmod(current, cells)
+        if cell == goal and time >= goal_time:
+            path = [cell]
+            while current in came_from:
+                current = came_from[current]
+                path.append(current % cells)
+            return path[::-1]
+
+        closed_set.add(current)
+        if time >= horizon:
+            continue
+
+        next_time = time + 1
+        for next_cell in neighbor_table[cell]:
+            neighbor = next_time * cells + next_cell
+            if neighbor in closed_set or neighbor in came_from:
+                continue
+            if not table.is_free(next_time, next_cell):
+                continue
+            if not table.is_move_free(time, cell, next_cell):
+                continue
+            came_from[neighbor] = current
+            f_score = next_time + distances[next_cell]
+            heapq.heappush(open_heap, (f_score, -next_time, neighbor))
+
+    return None
+
+
+class PrioritizedPlanner:
+    def __init__(self, environment, restarts: int = 20, seed: int = 0):
+        self.env = environment
+        self.restarts = restarts
+        self.random = random.Random(seed)
+        self.priorities = None  # Order that produced the returned plan
+
+    def plan(self, priorities, table=None):
+        """
+        Plan the agents in the given order, on top of the reservations
+        already in `table` if given. Return agent -> list of cells, or None
+        if one of them fails.
+        """
+        if table is None:
+            table = ReservationTable(self.env.num_cells)
+        paths = {}
+        for agent in priorities:
+            path = plan_with_reservations(self.env, agent, table)
+            if path is None:
+                return None
+            table.reserve(path)
+            paths[agent] = path
+        return paths
+
+    def find_paths(self):
+        priorities = list(self.env.agent_dict)
+        for _ in range(self.restarts + 1):
+            paths = self.plan(priorities)
+            if paths is not None:
+                self.priorities = priorities
+                return paths
+            priorities = priorities[:]
+            self.random.shuffle(priorities)
+        return None
+
+    def search(self):
+        paths = self.find_paths()
+        if paths is None:
+            return {}
+        return generate_plan(to_solution(self.env, paths))
+
+
+def to_solution(env: Environment, paths):
+    # Cell lists to the State paths CBS works with, in the agents' order
+    return {
+        agent: [
+            env.to_state(time * env.num_cells + cell)
+            for time, cell in enumerate(paths[agent])
+        ]
+        for agent in env.agent_dict
+    }
+
+
+def prioritized(inputpath, outputpath, restarts: int = 20, seed: int = 0):
+    try:
+        with open(inputpath, "r") as param_file:
+            env = load_environment(param_file)
+            planner = PrioritizedPlanner(env, restarts, seed)
+            solution = planner.search()
+
+            if not solution:
+                print("Solution not found")
+                return
+
+            write_output(outputpath, solution)
+            return solution
+
+    except Exception as e:
+        print(f"Error processing the input file: {e}")
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("input", help="input file containing map and agents")
+    parser.add_argument("output", help="output file with the schedule")
+    parser.add_argument(
+        "--restarts",
+        type=int,
+        default=20,
+        help="random priority orders to try after the first one fails",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="seed of the restarts")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    prioritized(args.input, args.output, args.restarts, args.seed)
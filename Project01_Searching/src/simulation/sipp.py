@@ -0,0 +1,180 @@
+"""
+Safe Interval Path Planning (SIPP): a low level search for CBS.
+
+Space-time A* (AStar) has one state per cell per timestep, so an agent
+that has to wait for a long time pays one expansion per tick. SIPP
+collapses time instead: the vertex constraints on a cell split the time
+line into safe intervals, maximal runs of timesteps where the agent may be
+there, and a search state is a (cell, safe interval) pair reached at the
+earliest possible time. Waiting inside an interval is free, so a state is
+only expanded once however long the agent stays. Edge constraints are
+checked on the departure time of each move.
+
+The path is expanded back into one State per timestep, as AStar returns
+it, so CBS, its conflict detection and the output do not change.
+
+Usage (at `src` directory):
+    python -m simulation.sipp ../data/input/input5_level4.txt output.txt
+"""
+
+import argparse
+import heapq
+
+from simulation.multiple_agents import MOVE_SHIFT, UNREACHABLE, cbs
+
+INFINITY = float("inf")
+
+
+class SIPP:
+    def __init__(self, env):
+        self.env = env
+        self.agent_dict = env.agent_dict
+        self.count_conflicts = env.count_conflicts
+
+    def get_safe_intervals(self):
+        """
+        Return cell -> list of (first, last) safe timesteps, in time order,
+        for the cells with a vertex constraint. Other cells are safe forever.
+        """
+        blocked_times = {}
+        for time, cells in self.env.constraints.vertex_constraints.items():
+            for cell in cells:
+                blocked_times.setdefault(cell, []).append(time)
+
+        safe_intervals = {}
+        for cell, times in blocked_times.items():
+            intervals = []
+            first = 0
+            for time in sorted(times):
+                if time > first:
+                    intervals.append((first, time - 1))
+                first = time + 1
+            intervals.append((first, INFINITY))
+            safe_intervals[cell] = intervals
+        return safe_intervals
+
+    def reconstruct_path(self, came_from, current, arrival):
+        """
+        Expand the chain of (cell, interval) states into one State per
+        timestep: the agent waits in each cell until its departure time.
+        """
+        env = self.env
+        cells = env.num_cells
+        moves = []  # (cell, arrival time), last state first
+        while current in came_from:
+            moves.append((current[0], arrival[current]))
+            current = came_from[current]
+        moves.append((current[0], 0))
+        moves.reverse()
+
+        path = []
+        for (cell, time), (_, next_time) in zip(moves, moves[1:] + [(None, None)]):
+            last_time = time if next_time is None else next_time - 1
+            for t in range(time, last_time + 1):
+                path.append(env.to_state(t * cells + cell))
+        return path
+
+    def search(self, agent_name):
+        """
+        low level search: A* over (cell, safe interval index) states
+
+        g is the earliest arrival time in the interval, and the tie-breaks
+        are those of AStar: fewer conflicts with the other agents' paths
+        (counted over the waits too), then larger g. The goal only counts in
+        its last safe interval, the one that never ends.
+        """
+        env = self.env
+        neighbor_table = env.neighbor_table
+        edge_constraints = env.constraints.edge_constraints
+        latest_time = env.constraints.latest_time
+        count_conflicts = self.count_conflicts
+        start = env.to_cell(self.agent_dict[agent_name]["start"].location)
+        goal = env.to_cell(self.agent_dict[agent_name]["goal"].location)
+        distances = env.distance_maps[agent_name]
+        if distances[start] == UNREACHABLE:
+            return False
+
+        safe_intervals = self.get_safe_intervals()
+        forever = [(0, INFINITY)]
+        start_intervals = safe_intervals.get(start, forever)
+        if start_intervals[0][0] > 0:
+            return False
+
+        start_state = (start, 0)
+        arrival = {start_state: 0}
+        conflicts = {start_state: count_conflicts(0, start)}
+        came_from = {}
+        closed_set = set()
+
+        # (f, conflicts, -g, state)
+        open_heap = [(distances[start], conflicts[start_state], 0, start_state)]
+
+        while open_heap:
+            _, current_conflicts, _, current = heapq.heappop(open_heap)
+            if current in closed_set:
+                continue
+
+            cell, index = current
+            time = arrival[current]
+            last_safe = safe_intervals.get(cell, forever)[index][1]
+            if cell == goal and last_safe == INFINITY:
+                return self.reconstruct_path(came_from, current, arrival)
+
+            closed_set.add(current)
+
+            for next_cell in neighbor_table[cell]:
+                if next_cell == cell:
+                    continue  # Waiting is part of the interval
+                for next_index, (first, last) in enumerate(
+                    safe_intervals.get(next_cell, forever)
+                ):
+                    # Leave between time and last_safe, arrive within [first, last]
+                    departure = max(time, first - 1)
+                    latest_departure = min(last_safe, last - 1)
+                    if departure > latest_departure:
+                        if first - 1 > last_safe:
+                            break
+                        continue
+                    move = cell << MOVE_SHIFT | next_cell
+                    while departure <= min(latest_departure, latest_time):
+                        if move not in edge_constraints.get(departure, ()):
+                            break
+                        departure += 1
+                    if departure > latest_departure:
+                        continue
+
+                    neighbor = (next_cell, next_index)
+                    next_time = departure + 1
+                    if neighbor in closed_set:
+                        continue
+                    if next_time > arrival.get(neighbor, INFINITY):
+                        continue
+                    tentative_conflicts = current_conflicts
+                    for t in range(time + 1, next_time):
+                        tentative_conflicts += count_conflicts(t, cell, cell)
+                    tentative_conflicts += count_conflicts(next_time, next_cell, cell)
+                    if next_time == arrival.get(neighbor) and (
+                        tentative_conflicts >= conflicts[neighbor]
+                    ):
+                        continue
+
+                    arrival[neighbor] = next_time
+                    conflicts[neighbor] = tentative_conflicts
+                    came_from[neighbor] = current
+                    f_score = next_time + distances[next_cell]
+                    heapq.heappush(
+                        open_heap, (f_score, tentative_conflicts, -next_time, neighbor)
+                    )
+        return False
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("input", help="input file containing map and agents")
+    parser.add_argument("output", help="output file with the schedule")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    cbs(args.input, args.output, SIPP)
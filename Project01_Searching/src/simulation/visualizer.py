@@ -1,11 +1,11 @@
 import sys
 import time
 import pygame
-from utils import format_path
+from utils import write_paths
 from typing import List, Tuple, Dict
 from citymap import CityMap, CellType
 from simulation.multiple_agents import Agent, get_agents, cbs
-from search_algorithms import bfs, dfs, ucs, gbfs, a_star
+from search_algorithms import LEVEL_ALGORITHMS, run_algorithm
 
 # Constants
 CELL_SIZE = 60
@@ -118,31 +118,10 @@ def draw_running_button(screen):
 
 # Function to visualize the path of a single agent
 def single_agent(screen, city_map: CityMap, output: str, level: int = 1):
-    algorithms = {
-        1: {
-            "BFS": bfs.bfs,
-            "DFS": dfs.dfs,
-            "UCS": ucs.ucs,
-            "GBFS": gbfs.gbfs,
-            "AStar": a_star.a_star,
-        },
-        2: {
-            "AStar": a_star.a_star,
-        },
-        3: {
-            "AStar": a_star.a_star,
-        },
-    }
-
     i = 0
     paths = {}
-    start = city_map.start
-    goal = city_map.goal
-    for name, algorithm in algorithms[level].items():
-        if level == 1:
-            path = algorithm(city_map, start, goal)
-        elif level <= 3:
-            path = algorithm(city_map, start, goal, level)
+    for name, algorithm in LEVEL_ALGORITHMS[level].items():
+        path = run_algorithm(algorithm, city_map, level)
 
         visualize_path(screen, city_map, path, PATH_COLORS[i])
         pygame.display.update()
@@ -153,10 +132,7 @@ def single_agent(screen, city_map: CityMap, output: str, level: int = 1):
 
     exit_button = draw_exit_button(screen)
     pygame.display.update()
-    with open(output, "w") as f:
-        for name, path in paths.items():
-            f.write(f"{name}: {format_path(path)}\n")
-            f.write("Path length: {}\n".format(len(path) - 1))
+    write_paths(output, paths)
 
     while True:
         for event in pygame.event.get():
@@ -223,11 +199,6 @@ def parse_path(path_str):
     ]
 
 
-# Function to format the path into a dictionary
-def format_path(path):
-    return " -> ".join(f"({x}, {y})" for x, y in path)
-
-
 # Function to visualize the paths of multiple agents
 def multiple_agent(screen, city_map: CityMap, output: str, filepath: str):
     agents = get_agents(city_map)
@@ -380,7 +351,8 @@ def draw_grid(screen, city_map: CityMap, font):
             x = col * CELL_SIZE
             y = row * CELL_SIZE
             rect = pygame.Rect(x, y, CELL_SIZE, CELL_SIZE)
-            celltype = city_map.grid[row][col].type
+            cell = city_map.get_cell((row, col))
+            celltype = cell.type
             if celltype == CellType.EMPTY:
                 color = BACKGROUND_COLOR
             elif celltype == CellType.OBSTACLE:
@@ -392,7 +364,7 @@ def draw_grid(screen, city_map: CityMap, font):
             pygame.draw.rect(screen, color, rect)
             pygame.draw.rect(screen, GRID_COLOR, rect, 1)
             if celltype not in [CellType.EMPTY, CellType.OBSTACLE]:
-                str_value = str(city_map.grid[row][col].value)
+                str_value = str(cell.value)
                 if celltype == CellType.FUEL_STATION:
                     str_value = "F" + str_value
                 text_surface = font.render(str_value, True, TEXT_COLOR)
@@ -39,11 +39,7 @@ Numbers (1, 4, 5, 8) - indicate the time required to travel between two points
 """
 
 from typing import List, Dict, Tuple
-from citymap import CityMap, CellType
-
-# Constants
-
-DIRECTIONS = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+from citymap import CityMap, DIRECTIONS
 
 
 def reconstruct_path(
@@ -71,6 +67,26 @@ def reconstruct_path(
     return path
 
 
+def reconstruct_index_path(
+    parent: List[int], start: int, goal: int, cols: int
+) -> List[Tuple[int, int]]:
+    # Same as reconstruct_path, for searches running on flat cell indices
+    # (parent[k] == -1 for cells never reached). Positions are (row, col).
+    if goal != start and parent[goal] == -1:
+        return []
+
+    path: List[Tuple[int, int]] = []
+    current = goal
+    while current != start:
+        path.append(divmod(current, cols))
+        current = parent[current]
+
+    path.append(divmod(start, cols))
+    path.reverse()
+
+    return path
+
+
 # Output path example: (1, 1) -> (2, 1) -> (3, 1) -> (4, 1)
 
 
@@ -80,28 +96,18 @@ def format_path(path: List[Tuple[int, int]]) -> str:
     return " -> ".join([f"({x}, {y})" for x, y in path])
 
 
-def heuristic(
-    a: Tuple[int, int],
-    b: Tuple[int, int],
-    city_map: CityMap,
-    level: int = 1,
-    current_fuel: int = 0,
-) -> int:
-    h = abs(a[0] - b[0]) + abs(a[1] - b[1])
-
-    if level <= 2:
-        return h
-
-    if current_fuel < h:
-        # Penalize paths with low fuel
-        min_fuel_station_dist = float("inf")
-        for i in range(city_map.rows):
-            for j in range(city_map.cols):
-                if city_map.get_cell((i, j)).type == CellType.FUEL_STATION:
-                    dist_to_fuel_station = abs(a[0] - i) + abs(a[1] - j)
-                    min_fuel_station_dist = min(
-                        min_fuel_station_dist, dist_to_fuel_station
-                    )
-        h += min_fuel_station_dist * 2  # Penalize distance to the nearest fuel station
-
-    return h
+# Single-agent output file: two lines per algorithm, in the given order
+# BFS: (1, 1) -> (1, 2) -> (2, 2)
+# Path length: 2
+# A failed search leaves the path empty: "BFS: " and "Path length: -1"
+
+
+def write_paths(output: str, paths: Dict[str, List[Tuple[int, int]]]) -> None:
+    with open(output, "w") as f:
+        for name, path in paths.items():
+            f.write(f"{name}: {format_path(path) if path else ''}\n")
+            f.write("Path length: {}\n".format(len(path) - 1))
+
+
+def heuristic(a: Tuple[int, int], b: Tuple[int, int], city_map: CityMap) -> int:
+    return abs(a[0] - b[0]) + abs(a[1] - b[1])
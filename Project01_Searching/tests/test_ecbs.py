@@ -0,0 +1,70 @@
+import glob
+import io
+import os
+import random
+
+import pytest
+
+from simulation.ecbs import ECBS
+from simulation.multiple_agents import CBS, load_environment
+
+INPUT_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "input")
+
+
+class PathsCBS(CBS):
+    def generate_plan(self, solution):
+        return solution
+
+
+class PathsECBS(ECBS):
+    def generate_plan(self, solution):
+        return solution
+
+
+def random_instance(seed):
+    # Small open grid with a few obstacles and 2 to 4 agents
+    rng = random.Random(seed)
+    size = rng.randint(4, 7)
+    grid = [[rng.choice(["0"] * 4 + ["-1"]) for _ in range(size)] for _ in range(size)]
+    num_agents = rng.randint(2, 4)
+    cells = rng.sample(
+        [(i, j) for i in range(size) for j in range(size)], 2 * num_agents
+    )
+    for agent in range(num_agents):
+        suffix = str(agent) if agent else ""
+        (i, j), (x, y) = cells[2 * agent], cells[2 * agent + 1]
+        grid[i][j] = "S" + suffix
+        grid[x][y] = "G" + suffix
+    rows = "\n".join(" ".join(row) for row in grid)
+    return f"{size} {size} 50 100\n{rows}"
+
+
+def instances():
+    for input_file in sorted(glob.glob(os.path.join(INPUT_DIR, "*_level4.txt"))):
+        with open(input_file) as f:
+            yield os.path.basename(input_file), f.read()
+    for seed in range(20):
+        yield f"random{seed}", random_instance(seed)
+
+
+def solve(solver_class, text, *args):
+    env = load_environment(io.StringIO(text))
+    solver = solver_class(env, *args)
+    return env, solver, solver.search()
+
+
+@pytest.mark.parametrize("name, text", list(instances()))
+@pytest.mark.parametrize("w", [1.0, 1.2, 1.5, 2.0])
+def test_ecbs_within_w_of_optimal(name, text, w):
+    env, _, optimal = solve(PathsCBS, text)
+    env, solver, solution = solve(PathsECBS, text, w)
+    if not optimal:
+        assert not solution
+        return
+
+    optimum = env.compute_solution_cost(optimal)
+    cost = env.compute_solution_cost(solution)
+    assert not env.get_all_conflicts(solution)
+    assert solver.lower_bound <= optimum
+    assert cost <= w * optimum
+    assert cost <= w * solver.lower_bound